@@ -0,0 +1,240 @@
+"""!
+@file aim_table.py
+    This file contains class AimTable, a lookup table giving how far the turret has to
+    turn to aim at a target seen at a given camera column, in place of the single
+    calibration constant main.py used to multiply the column by. It also has a
+    calibration sweep which builds the table by turning the turret past a heat source and
+    watching where it appears in the image, so the table takes in the lens, the camera's
+    mounting and the geartrain as they really are.
+
+    The camera rides on the turret, so a column gives the target's angle from wherever
+    the turret was pointing when the picture was taken; the table gives the turret move
+    from there, which BacklashCompensator.aim() turns into an absolute encoder setpoint.
+
+    With a heat source in front of the turret, run the calibration from the REPL; the
+    table is saved in aim_table.json on the board's flash, and main.py loads it at boot:
+    @code
+    import aim_table
+    aim_table.main()
+    @endcode
+
+@author Brendan Stratford
+@author Johnathan Waldmire
+@author Jonathan Romeo
+@date   10/18/2026
+"""
+
+import json
+from array import array
+import backlash
+
+## File in which the table is saved
+TABLE_FILE = 'aim_table.json'
+## Column, in hundredths, which looks straight along the barrel
+BORESIGHT = 1450
+
+
+class AimTable:
+    """!
+    Turret moves for evenly spaced camera columns, with straight line interpolation
+    between them. Because the columns are evenly spaced, lookup() finds its place in the
+    table with one division rather than a search. The moves are kept as integers scaled
+    by 2**shift, so looking one up allocates nothing. Columns beyond either end of the
+    table get the move at that end.
+    """
+
+    def __init__(self, moves, start=0, step=100, shift=4):
+        """!
+        @param moves: turret move for each column in the table [encoder counts]
+        @param start: column of the first entry [hundredths of a column]
+        @param step: spacing of the entries [hundredths of a column]
+        @param shift: the moves are kept scaled by 2**shift
+        """
+        if len(moves) < 2:
+            raise ValueError("An aim table needs at least two entries")
+        self.start = start
+        self.step = step
+        self.shift = shift
+        self._half = 1 << (shift - 1) if shift else 0
+        self._moves = array('l', [int(round(move * (1 << shift))) for move in moves])
+        self._last = len(moves) - 1
+
+    def lookup(self, val):
+        """!
+        @param val: column at which the target was seen [hundredths of a column]
+        @return how far to turn the turret to aim at it [encoder counts]
+        """
+        moves = self._moves
+        off = int(val) - self.start
+        if off <= 0:
+            return (moves[0] + self._half) >> self.shift
+        idx = off // self.step
+        if idx >= self._last:
+            return (moves[self._last] + self._half) >> self.shift
+        low = moves[idx]
+        move = low + (moves[idx + 1] - low) * (off - idx * self.step) // self.step
+        return (move + self._half) >> self.shift
+
+    def moves(self):
+        """!
+        @return list of the turret move for each column in the table [encoder counts]
+        """
+        return [move / (1 << self.shift) for move in self._moves]
+
+
+def linear_table(gain=backlash.AIM_GAIN, boresight=BORESIGHT, start=0, step=100, count=32):
+    """!
+    Make a table which does what main.py did before there was a table, turning the turret
+    by a fixed number of counts per hundredth of a column away from the boresight.
+    @param gain: encoder counts per hundredth of a column
+    @param boresight: column which looks along the barrel [hundredths of a column]
+    @param start: column of the first entry [hundredths of a column]
+    @param step: spacing of the entries [hundredths of a column]
+    @param count: number of entries
+    @return the AimTable
+    """
+    return AimTable([gain * (start + n * step - boresight) for n in range(count)], start, step)
+
+
+def _interp(xs, ys, x):
+    """!
+    Interpolate between points sorted by x, carrying on the first or last segment's
+    slope beyond either end.
+    """
+    n = 1
+    while n < len(xs) - 1 and xs[n] < x:
+        n += 1
+    return ys[n - 1] + (ys[n] - ys[n - 1]) * (x - xs[n - 1]) / (xs[n] - xs[n - 1])
+
+
+def table_from_points(points, boresight=BORESIGHT, start=0, step=100, count=32):
+    """!
+    Make a table from a calibration sweep: the column at which the target was seen for
+    each of a number of turret positions. The move for a column is from the turret
+    position at which the target appears there to the one at which it appears at the
+    boresight.
+    @param points: list of (column [hundredths of a column], turret position
+           [encoder counts]) pairs, at least two of them at different columns
+    @param boresight: column which looks along the barrel [hundredths of a column]
+    @param start: column of the first entry [hundredths of a column]
+    @param step: spacing of the entries [hundredths of a column]
+    @param count: number of entries
+    @return the AimTable
+    """
+    # Average the turret positions seen at the same column, then sort by column
+    seen = {}
+    for col, pos in points:
+        seen.setdefault(col, []).append(pos)
+    cols = sorted(seen)
+    if len(cols) < 2:
+        raise ValueError("The target has to be seen at two or more columns")
+    poss = [sum(seen[col]) / len(seen[col]) for col in cols]
+    aim = _interp(cols, poss, boresight)
+    return AimTable([aim - _interp(cols, poss, start + n * step) for n in range(count)],
+                    start, step)
+
+
+def load_table(path=TABLE_FILE):
+    """!
+    Get the table saved by a calibration, or the linear table if there isn't one.
+    @param path: name of the file holding the table
+    @return the AimTable
+    """
+    try:
+        with open(path) as file:
+            saved = json.load(file)
+        return AimTable(saved['moves'], saved['start'], saved['step'])
+    except (OSError, ValueError, KeyError):
+        return linear_table()
+
+
+def save_table(table, path=TABLE_FILE):
+    """!
+    Save a table for main.py to load at boot.
+    @param table: the AimTable
+    @param path: name of the file to save the table in
+    """
+    with open(path, 'w') as file:
+        json.dump({'start': table.start, 'step': table.step, 'moves': table.moves()}, file)
+
+
+def calibrate(comp, enc, con, camera, friction, span=100, step=10, boresight=BORESIGHT):
+    """!
+    Sweep the turret across a heat source, looking at it with the camera at each stop,
+    and make a table from what was seen. The sweep goes one way only, after taking up the
+    backlash, so the gears drive on the same side throughout and the encoder follows the
+    turret itself; BacklashCompensator adds the take-up to moves which reverse.
+    @param comp: BacklashCompensator for the panning motor
+    @param enc: Encoder on the panning motor
+    @param con: position controller for the panning motor, best without integral action
+    @param camera: MLX_Cam which can see the heat source
+    @param friction: duty cycle needed to get the motor turning [%]
+    @param span: how far to turn each way from where the turret starts [encoder counts]
+    @param step: how far to turn between stops [encoder counts]
+    @param boresight: column which looks along the barrel [hundredths of a column]
+    @return the AimTable
+    """
+    base = enc.read()
+    backlash.move_to(comp, enc, con, base - span - 2 * step, friction)
+    points = []
+    for move in range(-span, span + 1, step):
+        pos = backlash.move_to(comp, enc, con, base + move, friction)
+        try:
+            points.append((backlash.look(camera, 2), pos - base))
+        except ValueError:
+            pass                          # out of sight from here
+    backlash.move_to(comp, enc, con, base, friction)
+    return table_from_points(points, boresight)
+
+
+def main(save=True):
+    """!
+    Set up the panning motor and camera as main.py does, calibrate the table and save it.
+    @param save: True to save the table in TABLE_FILE
+    @return the AimTable
+    """
+    import pyb
+    from machine import I2C
+    import autotune
+    import mlx_cam
+    import motor_driver
+    import encoder_reader
+    import motor_controller
+
+    enPin = pyb.Pin(pyb.Pin.board.PA10, pyb.Pin.OUT_PP)
+    in2_pin = pyb.Pin(pyb.Pin.board.PB4, pyb.Pin.OUT_PP)
+    in1_pin = pyb.Pin(pyb.Pin.board.PB5, pyb.Pin.OUT_PP)
+    timmy = pyb.Timer(3, freq=20000)
+    ch_pos = timmy.channel(2, pyb.Timer.PWM, pin=in2_pin)
+    ch_neg = timmy.channel(1, pyb.Timer.PWM, pin=in1_pin)
+    moe = motor_driver.MotorDriver(enPin, in2_pin, in1_pin, timmy, ch_pos, ch_neg)
+
+    pinA = pyb.Pin(pyb.Pin.board.PB6, pyb.Pin.AF_PP, pull=pyb.Pin.PULL_NONE, af=pyb.Pin.AF1_TIM2)
+    pinB = pyb.Pin(pyb.Pin.board.PB7, pyb.Pin.AF_PP, pull=pyb.Pin.PULL_NONE, af=pyb.Pin.AF1_TIM2)
+    timer = pyb.Timer(4, prescaler=1, period=65535)
+    chan_A = timer.channel(1, pyb.Timer.ENC_AB, pin=pinA)
+    chan_B = timer.channel(2, pyb.Timer.ENC_AB, pin=pinB)
+    enc = encoder_reader.Encoder(pinA, pinB, timer, chan_A, chan_B)
+
+    camera = mlx_cam.MLX_Cam(I2C(1))
+    camera._camera.refresh_rate = 10.0
+    camera.set_roi(rows=(2, 22))
+
+    gains = autotune.load_gains()
+    con = motor_controller.FixedController(gains['k_p'], 0, 0)
+    comp = backlash.BacklashCompensator(moe, gains['backlash'])
+    try:
+        table = calibrate(comp, enc, con, camera, gains['k_s'])
+    finally:
+        moe.set_duty_cycle(0)
+    print("Column  Move")
+    for n, move in enumerate(table.moves()):
+        print(f"{table.start + n * table.step:6d}  {move:6.1f}")
+    if save:
+        save_table(table)
+        print(f"Saved in {TABLE_FILE}")
+    return table
+
+
+if __name__ == "__main__":
+    main()
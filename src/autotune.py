@@ -0,0 +1,267 @@
+"""!
+@file autotune.py
+    Finds gains for the panning motor's PI controller automatically. The motor is given two
+    steps in duty cycle while its encoder is read every control period; a first order plus
+    dead time (FOPDT) model of the motor's speed response is fitted to the data, and the
+    gains which should settle a move in a chosen time are worked out from the model using
+    the SIMC tuning rules for an integrating process. The test is run in both directions,
+    which also brings the turret back to about where it started, and the results averaged.
+
+    The gains are saved in gains.json along with the model, and main.py loads them at boot.
+    The file also holds feedforward settings for the motion profile: the duty cycle per
+    unit of speed and the duty cycle needed to overcome friction, both measured by the same
+    test. To retune after the geartrain has been rebuilt, with the turret free to swing
+    about 200 degrees each way, run this from the REPL:
+    @code
+    import autotune
+    autotune.main()                 # or autotune.main(settle_ms=250)
+    @endcode
+    The integral gain for the small aiming moves, k_i_aim, isn't found by the test, whose
+    steps are far larger than those moves; whatever gains.json already holds for it, or
+    the hand-tuned default, is kept.
+
+    On a PC, run it from the @c src directory with the simulated hardware on the path,
+    and it tunes the simulated motor:
+    @code
+    PYTHONPATH=sim python autotune.py
+    @endcode
+
+@author Brendan Stratford
+@author Johnathan Waldmire
+@author Jonathan Romeo
+@date   10/18/2026
+"""
+
+import json
+from array import array
+
+import pyb
+import utime
+import motor_driver
+import encoder_reader
+
+## File in which the gains are saved
+GAINS_FILE = 'gains.json'
+
+## Gains used when no tuning has been saved: the hand-tuned values main.py has always used
+DEFAULT_GAINS = {'k_p': 0.075,    # proportional gain [% per encoder count]
+                 'k_i': 0.001,    # integral gain for the first turn [% per encoder count]
+                 'k_i_aim': 0.1,  # integral gain for small aiming moves [% per encoder count]
+                 'k_v': 0.019,    # profile velocity feedforward [% per encoder count/s]
+                 'k_s': 8,        # profile friction feedforward [%]
+                 'backlash': 0,   # dead band width, found by backlash.py [encoder counts]
+                 }
+
+
+def load_gains(path=GAINS_FILE):
+    """!
+    Get the controller gains saved by an autotune run, filling in any which are missing
+    from the defaults.
+    @param path: name of the file holding the gains
+    @return dictionary of gains with at least the keys in DEFAULT_GAINS
+    """
+    gains = dict(DEFAULT_GAINS)
+    try:
+        with open(path) as file:
+            gains.update(json.load(file))
+    except (OSError, ValueError):
+        pass
+    return gains
+
+
+def save_gains(gains, path=GAINS_FILE):
+    """!
+    Save controller gains for main.py to load at boot.
+    @param gains: dictionary of gains, as made by tune()
+    @param path: name of the file to save the gains in
+    """
+    with open(path, 'w') as file:
+        json.dump(gains, file)
+
+
+def step_test(moe, enc, duties=(25, 45), hold_ms=300, period=10):
+    """!
+    Give the motor a series of steps in duty cycle, each held for the same time, and
+    record the encoder position every control period.
+    @param moe: MotorDriver for the motor
+    @param enc: Encoder on the motor
+    @param duties: the duty cycles to apply in turn [%]
+    @param hold_ms: how long each duty cycle is held [ms]
+    @param period: time between encoder readings [ms]
+    @return tuple (times [us], positions [encoder counts]) as arrays, each with
+            len(duties) * hold_ms // period + 1 readings starting just before the first step
+    """
+    per_step = hold_ms // period
+    count = len(duties) * per_step + 1
+    times = array('l', [0] * count)
+    positions = array('l', [0] * count)
+    start = utime.ticks_us()
+    next_us = start
+    for n in range(count):
+        while utime.ticks_diff(next_us, utime.ticks_us()) > 0:
+            utime.sleep_us(100)
+        times[n] = utime.ticks_diff(utime.ticks_us(), start)
+        positions[n] = enc.read()
+        if n < count - 1 and n % per_step == 0:
+            moe.set_duty_cycle(duties[n // per_step])
+        next_us = utime.ticks_add(next_us, period * 1000)
+    moe.set_duty_cycle(0)
+    return times, positions
+
+
+def _speeds(times, positions):
+    """!
+    Work out the speed between each pair of readings.
+    @return tuple (times at the middle of each interval [s], speeds [encoder counts/s])
+    """
+    mids = []
+    speeds = []
+    for n in range(1, len(times)):
+        dt = (times[n] - times[n - 1]) * 1e-6
+        mids.append((times[n] + times[n - 1]) * 0.5e-6)
+        speeds.append((positions[n] - positions[n - 1]) / dt)
+    return mids, speeds
+
+
+def _crossing(mids, speeds, first, last, level, rising):
+    """!
+    Find when the speed first passes a level, interpolating between readings.
+    @return the time of the crossing [s], or None if the speed never gets there
+    """
+    for n in range(first + 1, last):
+        if (speeds[n] >= level) if rising else (speeds[n] <= level):
+            frac = (level - speeds[n - 1]) / (speeds[n] - speeds[n - 1])
+            return mids[n - 1] + frac * (mids[n] - mids[n - 1])
+    return None
+
+
+def fit_fopdt(times, positions, duties, hold_ms, period):
+    """!
+    Fit a first order plus dead time model, speed = K * (duty - offset) with time constant
+    tau after a delay of dead, to the results of step_test() with two duty cycles. The gain
+    and friction offset come from the steady speeds at the two duty cycles; the time
+    constant and dead time come from the times at which the speed covers 28.3% and 63.2% of
+    the change after the second step (the two-point method of Smith).
+    @param times: times from step_test() [us]
+    @param positions: positions from step_test() [encoder counts]
+    @param duties: the two duty cycles used [%]
+    @param hold_ms: how long each duty cycle was held [ms]
+    @param period: time between readings [ms]
+    @return tuple (K [encoder counts/s per %], tau [s], dead [s], offset [%])
+    """
+    mids, speeds = _speeds(times, positions)
+    per_step = hold_ms // period
+    if per_step < 6:
+        raise ValueError("Each step needs to be held for at least six periods")
+
+    # Steady speeds, averaged over the last third of each step
+    steady = []
+    for k in range(2):
+        end = (k + 1) * per_step
+        first = end - per_step // 3
+        steady.append(sum(speeds[first:end]) / (end - first))
+    change = steady[1] - steady[0]
+    if change * (duties[1] - duties[0]) <= 0:
+        raise ValueError("The motor didn't speed up at the higher duty cycle")
+    gain = change / (duties[1] - duties[0])
+    offset = duties[0] - steady[0] / gain
+
+    rising = change > 0
+    step_time = times[per_step] * 1e-6
+    t28 = _crossing(mids, speeds, per_step, 2 * per_step, steady[0] + 0.283 * change, rising)
+    t63 = _crossing(mids, speeds, per_step, 2 * per_step, steady[0] + 0.632 * change, rising)
+    if t28 is None or t63 is None:
+        raise ValueError("The motor didn't settle; hold each step for longer")
+    tau = 1.5 * (t63 - t28)
+    dead = max(0.0, t63 - tau - step_time)
+    return gain, tau, dead, offset
+
+
+def pi_gains(gain, tau, dead, settle_ms, period):
+    """!
+    Work out PI gains for position control from the speed model, using the SIMC rules for
+    an integrating process with the motor's time constant added to its dead time. The
+    closed loop time constant is a quarter of the settling time, but no less than the
+    effective dead time, below which the loop would get oscillatory.
+    @param gain: K from fit_fopdt() [encoder counts/s per %]
+    @param tau: time constant from fit_fopdt() [s]
+    @param dead: dead time from fit_fopdt() [s]
+    @param settle_ms: time in which a move should settle [ms]
+    @param period: control period [ms]; the integral gain is per period, as the
+           controller adds the error to its sum once each run
+    @return tuple (k_p [% per encoder count], k_i [% per encoder count])
+    """
+    delay = dead + tau + period * 0.5e-3
+    tau_c = max(settle_ms * 0.25e-3, delay)
+    k_p = 1.0 / (abs(gain) * (tau_c + delay))
+    t_i = 4.0 * (tau_c + delay)
+    return k_p, k_p * period * 1e-3 / t_i
+
+
+def tune(moe, enc, settle_ms=300, duties=(25, 45), hold_ms=300, period=10):
+    """!
+    Run the step test forward and backward and work out gains from the averaged models.
+    @param moe: MotorDriver for the panning motor
+    @param enc: Encoder on the panning motor
+    @param settle_ms: time in which a move should settle [ms]
+    @param duties: the two duty cycles used in the test [%]
+    @param hold_ms: how long each duty cycle is held [ms]
+    @param period: control period [ms]
+    @return dictionary of gains and model parameters, suitable for save_gains(); it
+            has no k_i_aim, so saving it over the stored gains keeps the aiming gain
+    """
+    fits = []
+    for sign in (1, -1):
+        used = (sign * duties[0], sign * duties[1])
+        times, positions = step_test(moe, enc, used, hold_ms, period)
+        gain, tau, dead, offset = fit_fopdt(times, positions, used, hold_ms, period)
+        fits.append((gain, tau, dead, abs(offset)))
+        utime.sleep_ms(500)
+    gain, tau, dead, offset = (sum(fit[k] for fit in fits) / len(fits) for k in range(4))
+    k_p, k_i = pi_gains(gain, tau, dead, settle_ms, period)
+    return {'k_p': k_p, 'k_i': k_i,
+            'k_v': 1.0 / gain, 'k_s': offset,
+            'K': gain, 'tau': tau, 'dead': dead, 'settle_ms': settle_ms, 'period': period}
+
+
+def main(settle_ms=300, save=True):
+    """!
+    Set up the panning motor as main.py does, tune it and save the gains.
+    @param settle_ms: time in which a move should settle [ms]
+    @param save: True to save the gains in GAINS_FILE
+    @return dictionary of gains and model parameters
+    """
+    enPin = pyb.Pin(pyb.Pin.board.PA10, pyb.Pin.OUT_PP)
+    in2_pin = pyb.Pin(pyb.Pin.board.PB4, pyb.Pin.OUT_PP)
+    in1_pin = pyb.Pin(pyb.Pin.board.PB5, pyb.Pin.OUT_PP)
+    timmy = pyb.Timer(3, freq=20000)
+    ch_pos = timmy.channel(2, pyb.Timer.PWM, pin=in2_pin)
+    ch_neg = timmy.channel(1, pyb.Timer.PWM, pin=in1_pin)
+    moe = motor_driver.MotorDriver(enPin, in2_pin, in1_pin, timmy, ch_pos, ch_neg)
+    moe.set_duty_cycle(0)
+
+    pinA = pyb.Pin(pyb.Pin.board.PB6, pyb.Pin.AF_PP, pull=pyb.Pin.PULL_NONE, af=pyb.Pin.AF1_TIM2)
+    pinB = pyb.Pin(pyb.Pin.board.PB7, pyb.Pin.AF_PP, pull=pyb.Pin.PULL_NONE, af=pyb.Pin.AF1_TIM2)
+    timer = pyb.Timer(4, prescaler=1, period=65535)
+    chan_A = timer.channel(1, pyb.Timer.ENC_AB, pin=pinA)
+    chan_B = timer.channel(2, pyb.Timer.ENC_AB, pin=pinB)
+    enc = encoder_reader.Encoder(pinA, pinB, timer, chan_A, chan_B)
+
+    try:
+        gains = tune(moe, enc, settle_ms)
+    finally:
+        moe.set_duty_cycle(0)
+    print(f"Model: K = {gains['K']:.1f} counts/s per %, tau = {gains['tau'] * 1000:.0f} ms, "
+          f"dead time = {gains['dead'] * 1000:.0f} ms, friction = {gains['k_s']:.1f} %")
+    print(f"Gains: k_p = {gains['k_p']:.4f}, k_i = {gains['k_i']:.5f}, "
+          f"k_v = {gains['k_v']:.4f}, k_s = {gains['k_s']:.1f}")
+    if save:
+        saved = load_gains()
+        saved.update(gains)
+        save_gains(saved)
+        print(f"Saved in {GAINS_FILE}")
+    return gains
+
+
+if __name__ == "__main__":
+    main()
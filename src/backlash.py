@@ -0,0 +1,247 @@
+"""!
+@file backlash.py
+    This file contains class BacklashCompensator, which models the free play between the
+    panning motor, where the encoder is, and the turret, and works out encoder setpoints
+    which put the turret itself where the camera says it should be. It also has a
+    calibration sweep which measures the free play using the camera.
+
+    The geartrain's backlash means that when the motor reverses, it turns through a dead
+    band before the turret starts to follow. Rather than using different calibration
+    constants for moves that continue in the same direction and moves that reverse, the
+    compensator keeps track of which side of the dead band the gears are driving on and adds
+    a take-up move of the dead band's width to any move which reverses.
+
+    With the target in front of the turret, run the calibration from the REPL; the width
+    found is saved in gains.json with the controller gains, and main.py loads it at boot:
+    @code
+    import backlash
+    backlash.main()
+    @endcode
+    The width isn't adapted while the turret runs, so after the gears have worn, run the
+    calibration again.
+
+@author Brendan Stratford
+@author Johnathan Waldmire
+@author Jonathan Romeo
+@date   10/18/2026
+"""
+
+import utime
+
+## Encoder counts the turret turns per hundredth of a camera column, found by trial for
+#  moves which don't reverse (the README's 0.075)
+AIM_GAIN = 0.075
+
+
+class BacklashCompensator:
+    """!
+    Sits between the controller and the motor driver, and is used in place of the motor
+    driver: set_duty_cycle() passes the duty cycle on and remembers which way the motor was
+    last driven. Every control period, observe() is given the encoder reading, and a play
+    model estimates where the turret is: the turret stays put while the motor turns within
+    the dead band, and is pushed along once the motor reaches either edge of it. aim() then
+    turns a wanted turret move into an encoder setpoint, adding the dead band's width to a
+    move which reverses direction.
+
+    All the positions are whole encoder counts, so nothing is allocated per period.
+    """
+
+    def __init__(self, motor, width=0):
+        """!
+        @param motor: the MotorDriver to pass duty cycles on to
+        @param width: total width of the dead band [encoder counts]
+        """
+        self.motor = motor
+        ## Width of the dead band [encoder counts]
+        self.width = int(round(width))
+        self._half = self.width // 2
+        ## Estimated turret position, in encoder counts; None until the first reading
+        self.turret = None
+        ## The direction, +1 or -1, in which the motor was last driven
+        self.direction = 1
+
+    def set_duty_cycle(self, pwm):
+        """!
+        Drive the motor and remember which way it's being driven.
+        @param pwm: signed duty cycle [%]
+        """
+        if pwm > 0:
+            self.direction = 1
+        elif pwm < 0:
+            self.direction = -1
+        self.motor.set_duty_cycle(pwm)
+
+    def observe(self, pos):
+        """!
+        Update the turret estimate from an encoder reading.
+        @param pos: the encoder reading [encoder counts]
+        """
+        if self.turret is None:
+            # At power up the gears could be anywhere in the dead band; assume the middle
+            self.turret = pos
+        elif pos - self.turret > self._half:
+            self.turret = pos - self._half
+        elif self.turret - pos > self._half:
+            self.turret = pos + self._half
+
+    def aim(self, pos, move):
+        """!
+        Work out the encoder setpoint which turns the turret by a given amount.
+        @param pos: the encoder reading [encoder counts]
+        @param move: how far the turret should turn [encoder counts]
+        @return the encoder setpoint [encoder counts]
+        """
+        self.observe(pos)
+        if move == 0:
+            return pos
+        way = 1 if move > 0 else -1
+        # Once the move is finished the gears drive on the side facing the move, half the
+        # width ahead of the turret; the turret stays put until then
+        return self.turret + move + way * self._half
+
+    def set_width(self, width):
+        """!
+        Change the width of the dead band, keeping the turret estimate.
+        @param width: total width of the dead band [encoder counts]
+        """
+        self.width = int(round(width))
+        self._half = self.width // 2
+
+
+def move_to(comp, enc, con, setpoint, friction, period=10, tol=2, timeout_ms=2000):
+    """!
+    Move the motor to a setpoint and wait for it to settle, blocking. The moves here are
+    only a few counts, too small for the controller's output alone to overcome friction,
+    so the duty cycle needed to get the motor turning is added while it's off target.
+    @return the encoder reading once settled or timed out [encoder counts]
+    """
+    con.clear_esum(0)
+    hold = 0
+    next_us = utime.ticks_us()
+    for n in range(timeout_ms // period):
+        pos = enc.read()
+        comp.observe(pos)
+        err = setpoint - pos
+        if abs(err) <= tol:
+            comp.set_duty_cycle(0)
+            hold += 1
+            if hold > 4:
+                break
+        else:
+            hold = 0
+            comp.set_duty_cycle(con.run(setpoint, pos) + (friction if err > 0 else -friction))
+        next_us = utime.ticks_add(next_us, period * 1000)
+        utime.sleep_us(max(0, utime.ticks_diff(next_us, utime.ticks_us())))
+    comp.set_duty_cycle(0)
+    pos = enc.read()
+    comp.observe(pos)
+    return pos
+
+
+def look(camera, frames=1):
+    """!
+    Get the average target column from fresh camera frames, blocking.
+    @return the target column [hundredths of a column]
+    """
+    total = 0
+    for n in range(frames):
+        camera.get_image()           # the frame in progress may have started
+        image = camera.get_image()   # while the turret was still moving
+        val = camera.locate_target(image, limits=(0, 99))
+        if val is None:
+            raise ValueError("The camera can't see the target")
+        total += val
+    return total / frames
+
+
+def calibrate(comp, enc, con, camera, friction, step=2, limit=60, threshold=40,
+              gain=AIM_GAIN):
+    """!
+    Measure the width of the dead band. From each side in turn, the gears are engaged by
+    a move toward the target position, then the motor is stepped back the other way a
+    little at a time while the camera watches the target. Once the target has moved in the
+    image by more than @c threshold, the motor has crossed the dead band and turned the
+    turret by the amount the camera saw; the width is the motor's travel less that.
+    @param comp: BacklashCompensator for the panning motor
+    @param enc: Encoder on the panning motor
+    @param con: position controller for the panning motor, best without integral action
+    @param camera: MLX_Cam which can see the target
+    @param friction: duty cycle needed to get the motor turning [%]
+    @param step: how far to step the motor each time [encoder counts]
+    @param limit: the most travel to try before giving up [encoder counts]
+    @param threshold: how far the target must move to count as moved [hundredths of a column]
+    @param gain: encoder counts the turret turns per hundredth of a column
+    @return the width of the dead band [encoder counts]
+    """
+    base = enc.read()
+    widths = []
+    for way in (1, -1):
+        move_to(comp, enc, con, base - way * limit, friction)
+        start = move_to(comp, enc, con, base, friction)
+        before = look(camera)
+        travel = 0
+        while travel < limit:
+            travel += step
+            pos = move_to(comp, enc, con, base - way * travel, friction)
+            seen = look(camera)
+            if abs(seen - before) >= threshold:
+                widths.append(max(0.0, abs(pos - start) - abs(seen - before) * gain))
+                break
+        else:
+            raise ValueError("The target didn't move; is the motor turning?")
+    move_to(comp, enc, con, base, friction)
+    width = sum(widths) / len(widths)
+    comp.set_width(width)
+    return width
+
+
+def main(save=True):
+    """!
+    Set up the panning motor and camera as main.py does, measure the dead band and save it.
+    @param save: True to save the width in gains.json
+    @return the width of the dead band [encoder counts]
+    """
+    import pyb
+    from machine import I2C
+    import autotune
+    import mlx_cam
+    import motor_driver
+    import encoder_reader
+    import motor_controller
+
+    enPin = pyb.Pin(pyb.Pin.board.PA10, pyb.Pin.OUT_PP)
+    in2_pin = pyb.Pin(pyb.Pin.board.PB4, pyb.Pin.OUT_PP)
+    in1_pin = pyb.Pin(pyb.Pin.board.PB5, pyb.Pin.OUT_PP)
+    timmy = pyb.Timer(3, freq=20000)
+    ch_pos = timmy.channel(2, pyb.Timer.PWM, pin=in2_pin)
+    ch_neg = timmy.channel(1, pyb.Timer.PWM, pin=in1_pin)
+    moe = motor_driver.MotorDriver(enPin, in2_pin, in1_pin, timmy, ch_pos, ch_neg)
+
+    pinA = pyb.Pin(pyb.Pin.board.PB6, pyb.Pin.AF_PP, pull=pyb.Pin.PULL_NONE, af=pyb.Pin.AF1_TIM2)
+    pinB = pyb.Pin(pyb.Pin.board.PB7, pyb.Pin.AF_PP, pull=pyb.Pin.PULL_NONE, af=pyb.Pin.AF1_TIM2)
+    timer = pyb.Timer(4, prescaler=1, period=65535)
+    chan_A = timer.channel(1, pyb.Timer.ENC_AB, pin=pinA)
+    chan_B = timer.channel(2, pyb.Timer.ENC_AB, pin=pinB)
+    enc = encoder_reader.Encoder(pinA, pinB, timer, chan_A, chan_B)
+
+    camera = mlx_cam.MLX_Cam(I2C(1))
+    camera._camera.refresh_rate = 10.0
+    camera.set_roi(rows=(2, 22))
+
+    gains = autotune.load_gains()
+    con = motor_controller.FixedController(gains['k_p'], 0, 0)
+    comp = BacklashCompensator(moe)
+    try:
+        width = calibrate(comp, enc, con, camera, gains['k_s'])
+    finally:
+        moe.set_duty_cycle(0)
+    print(f"Backlash: {width:.1f} encoder counts")
+    if save:
+        gains['backlash'] = width
+        autotune.save_gains(gains)
+        print(f"Saved in {autotune.GAINS_FILE}")
+    return width
+
+
+if __name__ == "__main__":
+    main()
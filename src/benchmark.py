@@ -0,0 +1,343 @@
+"""!
+@file benchmark.py
+    Times the code which runs every control period and every camera frame: Encoder.read(),
+    Snapshot.take(), Controller.run(), FixedController.run(), TrapezoidProfile.step(),
+    MotorDriver.set_duty_cycle(), MLX_Cam.get_csv(), MLX_Cam.locate_target(), one
+    scheduler tick of the panning control loop in task2_fun and one tick of InnerLoop,
+    which on the board runs in a timer interrupt and so must allocate nothing at all.
+    task2_fun can't be run on its own, so the tick timed is a copy of one run of its
+    state 1, as main.py runs it with the timer driving the motor; it has to be kept in
+    step with main.py by hand.
+    For each one the mean and 99th percentile time per call and the memory allocated per
+    call are reported, and compared with a stored baseline. Anything which has gotten more
+    than 25% slower, or allocates more than it used to, fails.
+
+    On the board, copy this file over and run it from the REPL with
+    @code
+    import benchmark
+    benchmark.main()            # or benchmark.main(save=True) to store a new baseline
+    @endcode
+    Times come from utime.ticks_us(), and allocation is measured with gc.mem_alloc() while
+    the garbage collector is switched off, so it counts every byte allocated per call.
+    The motor is only ever given a duty cycle of zero.
+
+    On a PC, run it from the @c src directory with the simulated hardware in @c sim:
+    @code
+    python benchmark.py          # compare with the baseline
+    python benchmark.py --save   # store a new baseline
+    @endcode
+    Times come from the PC's clock, and allocation is the growth in the number of memory
+    blocks in use, which catches lists that keep growing but not short-lived objects.
+
+    Baselines are kept in bench_baseline.json, separately for the board and the PC. Times
+    depend on the computer, so each one stores its own with save=True (--save) before
+    the first comparison; until it has, every run fails.
+
+@author Brendan Stratford
+@author Johnathan Waldmire
+@author Jonathan Romeo
+@date   10/18/2026
+"""
+
+import gc
+import sys
+from array import array
+
+## True when running under MicroPython on the board
+ON_BOARD = sys.implementation.name == 'micropython'
+
+# Run on a PC, this file is an entry point like sim/run_sim.py, and puts the simulated
+# hardware on the path before anything imports pyb
+if __name__ == "__main__" and not ON_BOARD:
+    import os
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sim'))
+
+import pyb
+import json
+import cotask
+import mlx_cam
+import motor_driver
+import encoder_reader
+import motor_controller
+import motion_profile
+import inner_loop
+import snapshot
+import telemetry
+import task_share
+import response_log
+
+if ON_BOARD:
+    from utime import ticks_us, ticks_ms, ticks_diff
+
+    def _alloc():
+        return gc.mem_alloc()
+else:
+    import time
+
+    def ticks_us():
+        return time.perf_counter_ns() // 1000
+
+    def ticks_ms():
+        return time.perf_counter_ns() // 1000000
+
+    def ticks_diff(end, start):
+        return end - start
+
+    def _alloc():
+        return sys.getallocatedblocks()
+
+## File holding the stored baselines
+BASELINE_FILE = 'bench_baseline.json'
+## How much slower than the baseline a mean or 99th percentile time may get
+TOLERANCE = 0.25
+## Timing differences smaller than this are never counted as slower [us]
+SLACK_US = 2
+
+
+def _hardware():
+    """!
+    Set up the panning motor and its encoder the same way main.py does.
+    @return tuple (MotorDriver, Encoder)
+    """
+    enPin = pyb.Pin(pyb.Pin.board.PA10, pyb.Pin.OUT_PP)
+    in2_pin = pyb.Pin(pyb.Pin.board.PB4, pyb.Pin.OUT_PP)
+    in1_pin = pyb.Pin(pyb.Pin.board.PB5, pyb.Pin.OUT_PP)
+    timmy = pyb.Timer(3, freq=20000)
+    ch_pos = timmy.channel(2, pyb.Timer.PWM, pin=in2_pin)
+    ch_neg = timmy.channel(1, pyb.Timer.PWM, pin=in1_pin)
+    moe = motor_driver.MotorDriver(enPin, in2_pin, in1_pin, timmy, ch_pos, ch_neg)
+    moe.set_duty_cycle(0)
+
+    pinA = pyb.Pin(pyb.Pin.board.PB6, pyb.Pin.AF_PP, pull=pyb.Pin.PULL_NONE, af=pyb.Pin.AF1_TIM2)
+    pinB = pyb.Pin(pyb.Pin.board.PB7, pyb.Pin.AF_PP, pull=pyb.Pin.PULL_NONE, af=pyb.Pin.AF1_TIM2)
+    timer = pyb.Timer(4, prescaler=1, period=65535)
+    chan_A = timer.channel(1, pyb.Timer.ENC_AB, pin=pinA)
+    chan_B = timer.channel(2, pyb.Timer.ENC_AB, pin=pinB)
+    enc = encoder_reader.Encoder(pinA, pinB, timer, chan_A, chan_B)
+    return moe, enc
+
+
+class _Discard:
+    """!
+    A stream which throws away whatever is written to it, for telemetry to drain into.
+    """
+
+    def write(self, buf):
+        return len(buf)
+
+
+def _frame():
+    """!
+    Make a camera image with a warm stripe a little right of center, like a target.
+    @return array('h') of 768 pixel values
+    """
+    frame = array('h', [0] * 768)
+    seed = 12345
+    for idx in range(768):
+        seed = (seed * 1103515245 + 12345) & 0x7FFFFFFF
+        frame[idx] = (seed >> 16) % 60 - 30
+        if 4 <= idx // 32 < 20 and idx % 32 in (12, 13):
+            frame[idx] += 400
+    return frame
+
+
+def _cases():
+    """!
+    Build the list of things to time.
+    @return list of (name, function) pairs; each function does one call
+    """
+    moe, enc = _hardware()
+    con = motor_controller.Controller(0.075, 0.001, 0)
+    con.clear_esum(0)
+    # Set up as task2_fun sets up the panning loop's, with a log for the duel's record
+    duel = motor_controller.FixedController(0.075, 0.001, 0,
+                                            log=response_log.ResponseLog(300, post=100))
+    fixed = motor_controller.FixedController(0.075, 0.001, 0)
+    prof = motion_profile.TrapezoidProfile(3000, 15000, 10, k_v=0.019, k_s=8)
+    prof.start(0, 1000000)
+    camera = mlx_cam.MLX_Cam(None)
+    frame = _frame()
+    setpoint = enc.read()
+
+    # Telemetry as the tasks make it; task 3 empties the buffer in main.py, and here
+    # it's emptied whenever it fills
+    tele = telemetry.Telemetry(64, stream=_Discard())
+
+    def record():
+        if not tele.record(telemetry.SAMPLE, 2, 1, setpoint, setpoint, 0, 0):
+            tele.drain()
+
+    # The timer driven loop, holding the motor where it is
+    loop = inner_loop.InnerLoop(enc, motor_controller.FixedController(0.075, 0.0001, 0,
+                                                                      shift=18),
+                                moe, motion_profile.TrapezoidProfile(3000, 15000, 1, shift=10))
+    loop.tick()
+    loop.move(loop.position)
+
+    snap = snapshot.Snapshot(enc)
+    share = task_share.Share('l', name="Bench")
+
+    # A copy of one run of the panning loop in task2_fun, state 1, with the timer running
+    # the control loop, scheduled as a task; keep it in step with main.py. The setpoint
+    # is where the motor already is, so the motor is held still.
+    def control_loop():
+        while True:
+            snap.take()
+            share.put(snap.read())
+            duel.meas_time(ticks_ms())
+            duel.meas_pos(snap.read())
+            if not tele.record(telemetry.SAMPLE, 2, 1, snap.read(), setpoint, loop.pwm,
+                               duel.esum):
+                tele.drain()
+            if loop.done:
+                if abs(setpoint - snap.read()) < 10 and snap.at_rest(100, 10):
+                    tele.record(telemetry.DONE, 2, 1, snap.read(), setpoint)
+            yield 1
+
+    task = cotask.Task(control_loop, name="Bench", priority=1, period=None)
+
+    def tick():
+        task.go()
+        task.schedule()
+
+    return [('encoder_read', enc.read),
+            ('snapshot_take', snap.take),
+            ('controller_run', lambda: con.run(setpoint + 20, setpoint)),
+            ('fixed_run', lambda: fixed.run(setpoint + 20, setpoint)),
+            ('profile_step', lambda: prof.step() + prof.feedforward()),
+            ('set_duty_cycle', lambda: moe.set_duty_cycle(0)),
+            ('get_csv', lambda: camera.get_csv(frame, limits=(0, 99))),
+            ('locate_target', lambda: camera.locate_target(frame, limits=(0, 99))),
+            ('telemetry_record', record),
+            ('task2_tick', tick),
+            ('inner_tick', loop.tick)]
+
+
+def measure(fun, calls):
+    """!
+    Time a function and measure how much it allocates.
+    @param fun: function taking no arguments which does one call of the code to measure
+    @param calls: number of calls to make
+    @return tuple (mean time [us], 99th percentile time [us], allocation per call)
+    """
+    times = array('l', [0] * calls)
+    fun()
+    for n in range(calls):
+        start = ticks_us()
+        fun()
+        times[n] = ticks_diff(ticks_us(), start)
+
+    # Measure allocation separately, with the collector off so nothing is freed meanwhile
+    gc.collect()
+    gc.disable()
+    try:
+        before = _alloc()
+        for n in range(calls):
+            fun()
+        after = _alloc()
+    finally:
+        gc.enable()
+
+    ordered = sorted(times)
+    return (sum(ordered) / calls, ordered[min(calls - 1, (calls * 99) // 100)],
+            max(0, after - before) / calls)
+
+
+def best_of(fun, calls, repeat):
+    """!
+    Measure a function several times and keep the best of each figure, so that a run
+    which happened to be interrupted by something else doesn't count as a slowdown.
+    @param fun: function taking no arguments which does one call of the code to measure
+    @param calls: number of calls to make each time
+    @param repeat: number of times to measure
+    @return list [mean time [us], 99th percentile time [us], allocation per call]
+    """
+    best = list(measure(fun, calls))
+    for n in range(repeat - 1):
+        for k, value in enumerate(measure(fun, calls)):
+            best[k] = min(best[k], value)
+    return best
+
+
+def run(calls=1000, repeat=3):
+    """!
+    Measure every case.
+    @param calls: number of calls to time for each case
+    @param repeat: number of times to measure each case, keeping the best
+    @return dictionary of {name: [mean us, p99 us, allocation per call]}
+    """
+    results = {}
+    for name, fun in _cases():
+        results[name] = best_of(fun, calls, repeat)
+    return results
+
+
+def compare(results, baseline):
+    """!
+    Find the results which are worse than the baseline.
+    @param results: dictionary from run()
+    @param baseline: dictionary in the same form, or None
+    @return list of strings describing each failure
+    """
+    failures = []
+    if not baseline:
+        return failures
+    for name, (mean, p99, alloc) in results.items():
+        if name not in baseline:
+            continue
+        b_mean, b_p99, b_alloc = baseline[name]
+        if mean > b_mean * (1 + TOLERANCE) + SLACK_US:
+            failures.append(f'{name}: mean {mean:.1f} us, baseline {b_mean:.1f} us')
+        if p99 > b_p99 * (1 + TOLERANCE) + SLACK_US:
+            failures.append(f'{name}: p99 {p99:.1f} us, baseline {b_p99:.1f} us')
+        if alloc > b_alloc + 0.01:
+            failures.append(f'{name}: allocates {alloc:.2f} per call, baseline {b_alloc:.2f}')
+    return failures
+
+
+def main(save=False, calls=None):
+    """!
+    Run the benchmarks, print a table and compare with (or save) the baseline.
+    @param save: True to store these results as the new baseline
+    @param calls: number of calls per case; 1000 on the board, 5000 on a PC by default
+    @return True if nothing failed
+    """
+    if calls is None:
+        calls = 1000 if ON_BOARD else 5000
+    platform = sys.implementation.name
+    try:
+        with open(BASELINE_FILE) as file:
+            stored = json.load(file)
+    except (OSError, ValueError):
+        stored = {}
+    baseline = stored.get(platform)
+
+    results = run(calls)
+    unit = 'B/call' if ON_BOARD else 'blocks/call'
+    print(f"{'case':<16s}{'mean us':>10s}{'p99 us':>10s}{unit:>14s}")
+    for name, (mean, p99, alloc) in results.items():
+        print(f"{name:<16s}{mean:10.1f}{p99:10.1f}{alloc:14.2f}")
+
+    if save:
+        stored[platform] = results
+        with open(BASELINE_FILE, 'w') as file:
+            json.dump(stored, file)
+        print(f'Saved baseline for {platform} in {BASELINE_FILE}')
+        return True
+    if baseline is None:
+        print(f'FAIL no baseline for {platform} in {BASELINE_FILE}; run with save=True '
+              f'(--save) to store one')
+        return False
+    failures = compare(results, baseline)
+    for failure in failures:
+        print('FAIL', failure)
+    if not failures:
+        print('All cases within the baseline')
+    return not failures
+
+
+if __name__ == "__main__":
+    if ON_BOARD:
+        main()
+    else:
+        sys.exit(0 if main(save='--save' in sys.argv[1:]) else 1)
@@ -1,6 +1,7 @@
 """!
 @file encoder_reader.py
     This file contains class encoder_reader, which returns the position read from a DC motor encoder without overflow.
+    It also times each reading and estimates the motor's speed from the readings.
 
 @author Brendan Stratford
 @author Johnathan Waldmire
@@ -8,11 +9,33 @@
 @date   3/17/2024
 """
 
+import utime
+
+## Longest time the count is taken to have stood still [us]. The time of the last count is
+#  kept from falling further behind the latest reading than this, as utime.ticks_diff()
+#  gives the wrong sign for times more than 2**29 us (about 9 minutes) apart
+STILL_MAX_US = 1 << 28
+
 class Encoder:
     """!
     This class returns the position read from a DC motor encoder. This occurs without overflow, meaning the encoder value will continually increment or decrement without wrapping around.
+    
+    Each reading is time-stamped with utime.ticks_us(), and the speed is estimated two ways. At high speed, when
+    the count changes by at least @c switch between readings, the speed is the change in count over the time
+    between readings. At low speed that would only ever be a count or two per reading, so instead the speed is
+    the counts moved over the time since the count last changed, which is how long the last counts took to come
+    in. While the count stands still, the speed can be no more than one count over the time since it last
+    changed, so the estimate falls away to zero once the motor stops. The speed is then smoothed with a first
+    order filter. All the math is in integers, so reading the encoder allocates no memory.
     """
-    def __init__(self, pinA, pinB, timer, chan_A, chan_B):
+    def __init__(self, pinA, pinB, timer, chan_A, chan_B, switch=4, shift=1, timeout_ms=100):
+        """!
+        @param switch: the change in count between readings at which the speed is found by counting rather
+               than by timing [encoder counts]
+        @param shift: smoothing of the speed; each reading moves the estimate by 1/2**shift of the way to the
+               new value, so 0 is no smoothing
+        @param timeout_ms: time without a count after which the motor is taken to have stopped [ms]
+        """
         self.pinA = pinA
         self.pinB = pinB
         self.timer = timer
@@ -22,24 +45,87 @@ class Encoder:
         self.last_val = 0
         self.current_val = 0
         self.AR = 65535
+        self.delta = 0
+        self.switch = switch
+        self.shift = shift
+        self.timeout_us = timeout_ms * 1000
+        ## Time of the latest reading, from utime.ticks_us()
+        self.time = utime.ticks_us()
+        ## Smoothed speed [encoder counts/s]
+        self.velocity = 0
+        ## Speed from the latest reading alone [encoder counts/s]
+        self.raw_velocity = 0
+        self._edge_pos = 0
+        self._edge_time = self.time
     
     def read(self):
         
         ######
+        now = utime.ticks_us()
         self.current_val = self.timer.counter()
         self.delta = self.current_val - self.last_val
         delta_abs = self.delta
-        if self.delta >= (self.AR+1)/2:
+        if self.delta >= (self.AR+1)//2:
             self.delta -= self.AR+1
-        elif self.delta <= -(self.AR+1)/2:
+        elif self.delta <= -(self.AR+1)//2:
             self.delta += self.AR+1    
 
         self.last_val = self.current_val
         self.position += self.delta
+        
+        dt = utime.ticks_diff(now, self.time)
+        if dt > 0:
+            self.time = now
+            self._speed(now, dt)
         return self.position
     
+    def _speed(self, now, dt):
+        """!
+        Update the speed estimate from a reading taken @c dt microseconds after the one before.
+        """
+        delta = self.delta
+        since = utime.ticks_diff(now, self._edge_time)
+        if delta >= self.switch or delta <= -self.switch:
+            raw = delta * 1000000 // dt                                       # counting
+        elif delta:
+            raw = (self.position - self._edge_pos) * 1000000 // since         # timing
+        elif since >= self.timeout_us:
+            raw = 0
+        else:
+            # No new count, so the motor can be going no faster than one count in the time so far
+            raw = self.raw_velocity
+            bound = 1000000 // since
+            if raw > bound:
+                raw = bound
+            elif raw < -bound:
+                raw = -bound
+        if delta:
+            self._edge_pos = self.position
+            self._edge_time = now
+        elif since > STILL_MAX_US:
+            self._edge_time = utime.ticks_add(now, -STILL_MAX_US)
+        self.raw_velocity = raw
+        self.velocity += (raw - self.velocity) >> self.shift
+    
+    def at_rest(self, speed=50, hold_ms=20):
+        """!
+        Check whether the motor has stopped.
+        @param speed: the fastest the smoothed speed may be [encoder counts/s]
+        @param hold_ms: how long the count must have stood still [ms]
+        @return True if the motor is at rest as of the latest reading
+        """
+        return -speed <= self.velocity <= speed and self.still_us() >= hold_ms * 1000
+    
+    def still_us(self):
+        """!
+        @return how long the count had stood still as of the latest reading, up to
+                STILL_MAX_US [us]
+        """
+        return utime.ticks_diff(self.time, self._edge_time)
+    
     def zero(self):
         self.position = 0
+        self._edge_pos = 0
         
 
 if __name__ == "__main__":
@@ -0,0 +1,234 @@
+"""!
+@file frame_log.py
+    This file contains class FrameRecorder, which saves raw thermal camera frames to a compact
+    binary log on the board, and class FrameReplay, which reads such a log back on a PC.
+
+    A log starts with an 8 byte header: the characters "MLXF", a format version, the image
+    width and height, and a spare byte. Every frame after that takes the same number of
+    bytes: a 12 byte record header holding the frame ID (unsigned 32 bit), the time it was
+    taken in ms from utime.ticks_ms() (unsigned 32 bit), the subpage it came from or -1 for
+    a whole image (signed 16 bit) and two spare bytes, followed by the pixels as signed
+    16 bit values, all little-endian. Since every record is the same size, any frame can be
+    found without reading the ones before it.
+
+    Logs on the board are kept to a size with open_append(): a log which has grown past
+    its limit is moved aside to a @c .old file and a new one started, so at most twice
+    the limit of flash is ever used.
+
+@author Brendan Stratford
+@author Johnathan Waldmire
+@author Jonathan Romeo
+@date   10/18/2026
+"""
+
+import os
+import struct
+
+## The first four bytes of every frame log
+MAGIC = b'MLXF'
+## The version of the log format written by FrameRecorder
+VERSION = 1
+## Layout of the log header: magic, version, width, height, spare
+HEADER = '<4sBBBx'
+## Layout of each frame's record header: frame ID, time, subpage, spare
+RECORD = '<IIh2x'
+
+
+def open_append(path, max_bytes=None):
+    """!
+    Open a log file for appending. If the file has already reached @c max_bytes, it's
+    renamed to @c path + '.old', replacing any older one, and a new file is started.
+    @param path: name of the log file
+    @param max_bytes: size at which the file is moved aside, or None to let it grow
+    @return the open file, positioned at its end
+    """
+    file = open(path, 'ab')
+    if max_bytes is not None and file.tell() >= max_bytes:
+        file.close()
+        try:
+            os.remove(path + '.old')
+        except OSError:     # there was no older log
+            pass
+        os.rename(path, path + '.old')
+        file = open(path, 'ab')
+    return file
+
+
+class FrameRecorder:
+    """!
+    Writes raw camera frames to a binary log file. Each frame is written straight from the
+    camera's frame buffer and the record header is packed into a preallocated buffer, so
+    recording a frame doesn't copy the image. Frames are added to the end of an existing log.
+    Writing to a full flash raises OSError, as writing any file does.
+    """
+
+    def __init__(self, path, width=32, height=24, max_bytes=None):
+        """!
+        Open a frame log for appending, writing the log header if the file is new.
+        @param path: name of the log file, such as 'frames.mlx'
+        @param width: width of the images in pixels
+        @param height: height of the images in pixels
+        @param max_bytes: size at which an existing log is moved aside and a new one
+               started, or None to let it grow
+        """
+        self.width = width
+        self.height = height
+        self.count = 0
+        self._rec = bytearray(struct.calcsize(RECORD))
+        self._file = open_append(path, max_bytes)
+        if self._file.tell() == 0:
+            self._file.write(struct.pack(HEADER, MAGIC, VERSION, width, height))
+
+    def write(self, frame, frame_id, stamp, subpage=-1):
+        """!
+        Add one frame to the log.
+        @param frame: array('h') of width*height pixel values
+        @param frame_id: number identifying the frame
+        @param stamp: time the frame was taken [ms]
+        @param subpage: subpage the new pixels came from, or -1 for a whole image
+        """
+        struct.pack_into(RECORD, self._rec, 0, frame_id, stamp, subpage)
+        self._file.write(self._rec)
+        self._file.write(frame)
+        self.count += 1
+
+    def record(self, camera):
+        """!
+        Add the latest frame streamed by an MLX_Cam to the log.
+        @param camera: MLX_Cam which has completed at least one frame
+        """
+        subpage = camera.frame_subpage
+        self.write(camera.latest(), camera.frame_id, camera.frame_ms,
+                   -1 if subpage is None else subpage)
+
+    def flush(self):
+        """!
+        Make sure the frames recorded so far are in the file.
+        """
+        self._file.flush()
+
+    def close(self):
+        """!
+        Close the log file.
+        """
+        self._file.close()
+
+
+class FrameReplay:
+    """!
+    Reads a frame log written by FrameRecorder on a PC. The file is memory-mapped and each
+    frame is handed out as a memoryview of signed 16 bit pixels within the mapping, so
+    thousands of frames can be run through the image processing without reading or copying
+    them first. get_image_nonblocking() works like the one in MLX_Cam, returning each frame
+    in turn and setting frame_id, frame_ms and frame_subpage to match.
+
+    This needs CPython's mmap module and a little-endian computer, which is almost any PC.
+    """
+
+    def __init__(self, path):
+        """!
+        Open and map a frame log.
+        @param path: name of the log file
+        """
+        import mmap
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.width, self.height = struct.unpack_from(HEADER, self._map)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'{path} is not a version {VERSION} frame log')
+        self._start = struct.calcsize(HEADER)
+        self._head = struct.calcsize(RECORD)
+        self._size = self._head + 2 * self.width * self.height
+        self._count = (len(self._map) - self._start) // self._size
+        # The whole log as 16 bit values, which every record header and image is a
+        # whole number of, so each frame is one slice of it
+        self._view = memoryview(self._map)[:len(self._map) & ~1].cast('h')
+        # Every frame handed out, for close() to release
+        self._frames = []
+        self._next = 0
+        self.frame_id = 0
+        self.frame_ms = 0
+        self.frame_subpage = None
+
+    def __len__(self):
+        return self._count
+
+    def info(self, n):
+        """!
+        Get the record header of a frame.
+        @param n: position of the frame in the log, starting at 0
+        @return tuple (frame ID, time [ms], subpage or None)
+        """
+        frame_id, stamp, subpage = struct.unpack_from(RECORD, self._map,
+                                                      self._start + n * self._size)
+        return frame_id, stamp, None if subpage < 0 else subpage
+
+    def frame(self, n):
+        """!
+        Get a frame's pixels without copying them.
+        @param n: position of the frame in the log, starting at 0
+        @return memoryview of width*height signed 16 bit pixel values
+        """
+        if not 0 <= n < self._count:
+            raise IndexError('frame number out of range')
+        offset = (self._start + n * self._size + self._head) // 2
+        frame = self._view[offset:offset + (self._size - self._head) // 2]
+        self._frames.append(frame)
+        return frame
+
+    def get_image_nonblocking(self):
+        """!
+        Get the next frame in the log, as MLX_Cam.get_image_nonblocking() would.
+        @return memoryview of the frame's pixels, or None after the last frame
+        """
+        if self._next >= self._count:
+            return None
+        n = self._next
+        self._next += 1
+        self.frame_id, self.frame_ms, self.frame_subpage = self.info(n)
+        return self.frame(n)
+
+    def rewind(self):
+        """!
+        Start again from the first frame.
+        """
+        self._next = 0
+
+    def __iter__(self):
+        for n in range(self._count):
+            yield self.frame(n)
+
+    def close(self):
+        """!
+        Unmap and close the log file. Every frame taken from the log is released first, so
+        using one after this raises ValueError.
+        """
+        for frame in self._frames:
+            frame.release()
+        self._frames.clear()
+        self._view.release()
+        self._map.close()
+        self._file.close()
+
+
+if __name__ == "__main__":
+    # Run the aiming code over every frame in a log on a PC and time it, e.g.
+    #     python frame_log.py frames.mlx
+    import sys
+    import time
+    import mlx_cam
+
+    replay = FrameReplay(sys.argv[1])
+    camera = mlx_cam.MLX_Cam(None, width=replay.width, height=replay.height)
+    elapsed = 0
+    while True:
+        image = replay.get_image_nonblocking()
+        if image is None:
+            break
+        start = time.perf_counter()
+        val = camera.locate_target(image, limits=(0, 99), subpage=replay.frame_subpage)
+        elapsed += time.perf_counter() - start
+        print(f'{replay.frame_id},{replay.frame_ms},{val},{camera.hot_rows},{camera.confidence}')
+    if len(replay):
+        print(f'{len(replay)} frames, {elapsed / len(replay) * 1e6:.1f} us per frame',
+              file=sys.stderr)
@@ -0,0 +1,268 @@
+"""!
+@file inner_loop.py
+    This file contains class InnerLoop, which runs the panning motor's position control
+    loop (encoder reading, motion profile, PI controller and motor driver) from a hardware
+    timer's interrupt at a fixed rate, such as 1 kHz. The cooperative tasks then only set
+    targets and watch the results, so the camera's I2C transfers, printing and garbage
+    collection in the tasks no longer change how often the motor is controlled.
+
+    Nothing may be allocated in an interrupt on MicroPython, so everything called from the
+    interrupt works in small integers: the encoder, FixedController, TrapezoidProfile and
+    BacklashCompensator all do. The loop also keeps statistics of its own timing, so that
+    how steady the rate stays under camera load can be checked on the board:
+    @code
+    >>> loop.print_stats()
+    ticks 12000  interval 994..1007 us  jitter max 7 us  mean 1.2 us  busy max 212 us  overruns 0
+    @endcode
+
+@author Brendan Stratford
+@author Johnathan Waldmire
+@author Jonathan Romeo
+@date   10/18/2026
+"""
+
+from array import array
+import micropython
+import pyb
+import utime
+
+# Room to report an exception raised in the interrupt, which can't allocate its own
+micropython.alloc_emergency_exception_buf(100)
+
+## Limit kept to by the timing statistics' running counts and sums, well inside
+#  MicroPython's small integers, past which adding to them in the interrupt would allocate
+STAT_MAX = 1 << 28
+
+
+class InnerLoop:
+    """!
+    A fixed rate position control loop. Each tick reads the encoder, steps the motion
+    profile, runs the controller and sets the motor's duty cycle. After the profile has
+    stopped, the friction duty cycle @c kick is added while the motor is more than @c tol
+    counts off target, as the move needs it to finish the last few counts.
+
+    The loop is driven by a timer once start() has been called; without a timer, tick()
+    can be called from a task instead, which also records the task's timing for
+    comparison. move() starts a move to a new target and release() stops driving the
+    motor, though the encoder keeps being read so @c position stays current. While the
+    timer runs, only this loop may read the encoder, as two readers would each miss the
+    counts the other had taken.
+
+    The timing statistics are the interval between ticks, how far it was from the nominal
+    period (the jitter), how long each tick took to run, and how many ticks took longer
+    than a period. The jitter is also counted in a histogram with @c bin_us wide bins.
+    """
+
+    def __init__(self, enc, con, motor, prof, period_us=1000, kick=0, tol=2, bins=16,
+                 bin_us=5):
+        """!
+        @param enc: Encoder on the panning motor
+        @param con: FixedController for the panning motor
+        @param motor: MotorDriver or BacklashCompensator to drive; a BacklashCompensator
+               is also given every encoder reading
+        @param prof: TrapezoidProfile whose period is the loop's period
+        @param period_us: the loop's period [us]
+        @param kick: duty cycle added to finish a move, to get past friction [%]
+        @param tol: error below which no kick is added [encoder counts]
+        @param bins: number of bins in the jitter histogram; the last takes anything larger
+        @param bin_us: width of each bin in the jitter histogram [us]
+        """
+        self.enc = enc
+        self.con = con
+        self.motor = motor
+        self.prof = prof
+        self.period_us = period_us
+        self.kick = kick
+        self.tol = tol
+        self.bin_us = bin_us
+        self._observe = getattr(motor, 'observe', None)
+        self._cb = self._tick            # made once, so the interrupt needn't make it
+        self.timer = None
+        ## Latest encoder reading [encoder counts]
+        self.position = enc.position
+        ## Where the current move ends [encoder counts]
+        self.target = enc.position
+        ## True while the loop is driving the motor
+        self.enabled = False
+        ## Duty cycle the loop last set [%]
+        self.pwm = 0
+        ## Number of ticks with the jitter in each bin
+        self.hist = array('L', [0] * bins)
+        self.reset_stats()
+
+    def start(self, timer=6):
+        """!
+        Start running the loop from a hardware timer's interrupt.
+        @param timer: number of a timer which isn't used for anything else; 6 and 7 have
+               no pins, so don't take any from PWM or encoders
+        """
+        self.reset_stats()
+        self.timer = pyb.Timer(timer, freq=1000000 // self.period_us)
+        self.timer.callback(self._cb)
+
+    def stop(self):
+        """!
+        Stop the timer and the motor.
+        """
+        if self.timer is not None:
+            self.timer.callback(None)
+            self.timer.deinit()
+            self.timer = None
+        self.release()
+
+    @property
+    def running(self):
+        """!
+        True if a timer is running the loop.
+        """
+        return self.timer is not None
+
+    def move(self, target):
+        """!
+        Start a move from where the motor is to a new target.
+        @param target: the encoder setpoint [encoder counts]
+        """
+        state = pyb.disable_irq()
+        self.prof.start(self.position, target)
+        self.con.clear_esum(0)
+        self.target = target
+        self.enabled = True
+        pyb.enable_irq(state)
+
+    def release(self):
+        """!
+        Stop driving the motor, which is left with no duty cycle.
+        """
+        state = pyb.disable_irq()
+        self.enabled = False
+        self.motor.set_duty_cycle(0)
+        self.pwm = 0
+        pyb.enable_irq(state)
+
+    @property
+    def done(self):
+        """!
+        True once the profile has reached the target; the motor may still be settling.
+        """
+        return self.prof.done
+
+    def tick(self):
+        """!
+        Run the loop once, when no timer is running it.
+        """
+        self._tick(None)
+
+    def _tick(self, timer):
+        """!
+        One pass of the control loop, run from the timer's interrupt.
+        """
+        now = utime.ticks_us()
+        pos = self.enc.read()
+        if self._observe is not None:
+            self._observe(pos)
+        if self.enabled:
+            prof = self.prof
+            if not prof.done:         # integrate only once the profile has stopped, so
+                self.con.clear_esum(0) # the integral doesn't wind up while tracking it
+            pwm = self.con.run(prof.step(), pos) + prof.feedforward()
+            if prof.done:
+                err = self.target - pos
+                if err > self.tol:
+                    pwm += self.kick
+                elif err < -self.tol:
+                    pwm -= self.kick
+            self.motor.set_duty_cycle(pwm)
+            self.pwm = pwm
+        self.position = pos
+
+        # Timing statistics, all in small integers
+        if self._last_us >= 0:
+            interval = utime.ticks_diff(now, self._last_us)
+            if interval < self.min_us:
+                self.min_us = interval
+            if interval > self.max_us:
+                self.max_us = interval
+            jitter = interval - self.period_us
+            if jitter < 0:
+                jitter = -jitter
+            if jitter > self.jitter_max:
+                self.jitter_max = jitter
+            self.jitter_sum += jitter
+            self._jitter_n += 1
+            if self.jitter_sum >= STAT_MAX:
+                # Halve the sum and its count together, which keeps the mean but
+                # weights it toward recent ticks
+                self.jitter_sum >>= 1
+                self._jitter_n >>= 1
+            if self.intervals < STAT_MAX:
+                self.intervals += 1
+            idx = jitter // self.bin_us
+            last = len(self.hist) - 1
+            self.hist[idx if idx < last else last] += 1
+        self._last_us = now
+        if self.ticks < STAT_MAX:
+            self.ticks += 1
+        busy = utime.ticks_diff(utime.ticks_us(), now)
+        if busy > self.busy_max:
+            self.busy_max = busy
+        if busy > self.period_us:
+            self.overruns += 1
+
+    def reset_stats(self):
+        """!
+        Clear the timing statistics.
+        """
+        state = pyb.disable_irq()
+        self._last_us = -1
+        ## Number of ticks run, up to STAT_MAX
+        self.ticks = 0
+        ## Number of intervals between ticks measured, up to STAT_MAX
+        self.intervals = 0
+        ## Shortest and longest interval between ticks [us]
+        self.min_us = 1 << 29
+        self.max_us = 0
+        ## Largest and total difference between an interval and the period [us]; the
+        #  total is halved, with the count it's averaged over, whenever it reaches
+        #  STAT_MAX
+        self.jitter_max = 0
+        self.jitter_sum = 0
+        self._jitter_n = 0
+        ## Longest time a tick took to run [us]
+        self.busy_max = 0
+        ## Number of ticks which took longer than the period to run
+        self.overruns = 0
+        for n in range(len(self.hist)):
+            self.hist[n] = 0
+        pyb.enable_irq(state)
+
+    def stats(self):
+        """!
+        @return dictionary of the timing statistics since they were last cleared, with
+                times in microseconds
+        """
+        count = self._jitter_n
+        return {'ticks': self.ticks,
+                'period_us': self.period_us,
+                'min_us': self.min_us if count else 0,
+                'max_us': self.max_us,
+                'jitter_max_us': self.jitter_max,
+                'jitter_mean_us': self.jitter_sum / count if count else 0.0,
+                'busy_max_us': self.busy_max,
+                'overruns': self.overruns,
+                'bin_us': self.bin_us,
+                'hist': list(self.hist)}
+
+    def print_stats(self):
+        """!
+        Print the timing statistics and the jitter histogram.
+        """
+        s = self.stats()
+        print(f"ticks {s['ticks']}  interval {s['min_us']}..{s['max_us']} us  "
+              f"jitter max {s['jitter_max_us']} us  mean {s['jitter_mean_us']:.1f} us  "
+              f"busy max {s['busy_max_us']} us  overruns {s['overruns']}")
+        last = len(s['hist']) - 1
+        for n, count in enumerate(s['hist']):
+            if count:
+                low = n * self.bin_us
+                high = f"{low + self.bin_us - 1:4d}" if n < last else "    "
+                print(f"  jitter {low:4d}..{high} us  {count}")
@@ -15,21 +15,128 @@ import pyb
 import cotask
 import task_share
 import motor_driver
+import servo_driver
 import encoder_reader
 import motor_controller
+import motion_profile
+import autotune
+import backlash
+import aim_table
+import response_log
+import inner_loop
+import snapshot
+import sched_profile
+import task_wait
+import target_queue
+import telemetry
 import utime as time
 from machine import Pin, I2C
 from mlx90640 import MLX90640
 from mlx90640.calibration import NUM_ROWS, NUM_COLS, IMAGE_SIZE, TEMP_K
 from mlx90640.image import ChessPattern, InterleavedPattern
 import mlx_cam
+import frame_log
 import task_share
 
+## Rate of the timer driven inner control loop for the panning motor [Hz]; 0 runs the
+#  loop in task 2 instead, once each task period
+LOOP_HZ = 1000
+
+## Targets older than this when the motor task gets them are thrown away [ms]
+MAX_TARGET_AGE = 500
+
+## True to keep aiming at the target from every frame and fire once aimed, for a
+#  target which moves; False to take one picture of a frozen target and fire once
+TRACK = False
+## Largest aim error at which the gun may fire while tracking [encoder counts]
+AIM_TOL = 5
+## How long the aim error has to stay within AIM_TOL before firing [ms]
+AIM_HOLD_MS = 150
+## Number of shots fired while tracking
+TRACK_SHOTS = 3
+## UART the binary telemetry is sent on, so it never mixes with the text printed to the
+#  REPL's serial port; its TX pin goes to a USB serial adapter on the PC
+TELE_UART = 3
+## Baud rate of the telemetry UART; writes wait for the bytes to go out, so a fast rate
+#  keeps task 3's bulk writes short
+TELE_BAUD = 921600
+## Most frames saved to frames.mlx in a run; each takes about 1.5 kB of flash, and
+#  writing one holds up the camera task
+LOG_FRAMES = 8
+## Size past which frames.mlx is moved to frames.mlx.old at start-up [bytes]
+FRAME_LOG_MAX = 16 * 1024
+## Size past which duels.csv is moved to duels.csv.old before a duel is added; each
+#  duel takes about 5 kB [bytes]
+DUEL_LOG_MAX = 16 * 1024
+
+def print_report(loop, snap):
+    """!
+    @brief   Prints how the run went, once the gun has finished firing.
+    @details How steady the control loop's rate was, how many encoder reads the snapshots
+             saved, what telemetry was sent and which states held up the tasks.
+    @param   loop: the InnerLoop driving the panning motor
+    @param   snap: the Snapshot of the panning encoder
+    """
+    loop.print_stats()
+    print('SNAP', snap.taken, 'taken', snap.saved, 'reads saved')
+    print(tele)
+    profiler.print_report()
+
+
+def save_duel(log):
+    """!
+    @brief   Adds a duel's position log to duels.csv and starts logging the next one.
+    @details The file is kept below about DUEL_LOG_MAX, and if the flash is full the
+             duel just isn't saved, so the turret carries on either way.
+    @param   log: the ResponseLog, once it's frozen with the second after the shot
+    """
+    try:
+        with frame_log.open_append('duels.csv', DUEL_LOG_MAX) as file:
+            file.write(b'time,pos\n')
+            log.dump(file, relative=True)
+    except OSError:
+        print('No room to save the duel')
+    log.rearm()
+
+
+def save_frame(recorder, camera):
+    """!
+    @brief   Adds the camera's latest frame to the frame log, so a miss can be replayed later.
+    @details The log is closed once it has LOG_FRAMES frames from this run, or as soon as
+             the flash is full, as a frame log is never worth stopping the turret for.
+    @param   recorder: the FrameRecorder
+    @param   camera: the MLX_Cam which streamed the frame
+    @return  the recorder, or None once it's closed
+    """
+    try:
+        recorder.record(camera)
+        if recorder.count < LOG_FRAMES:
+            recorder.flush()
+            return recorder
+    except OSError:
+        pass
+    return close_frames(recorder)
+
+
+def close_frames(recorder):
+    """!
+    @brief   Closes the frame log, even if the flash is too full for its last frames.
+    @param   recorder: the FrameRecorder
+    @return  None, for the caller to keep in place of the recorder
+    """
+    try:
+        recorder.close()
+    except OSError:
+        pass
+    return None
+
+
 def task1_fun():
     """!
     @brief   Accepts camera input via I2C.
-    @details Camera processing. Takes a picture after 5 seconds, when the target is frozen.
+    @details Camera processing. Takes a picture 4 seconds after start-up, when the target is frozen.
              Filters data, omitting rows and columns on the edges of the frame to focus on the target.
+             With TRACK set, carries on finding the target in every frame after that.
     """
     
     t1_state = 0
@@ -64,39 +171,67 @@ def task1_fun():
             # Create the camera object and set it up in default mode
             camera = mlx_cam.MLX_Cam(i2c_bus)
             camera._camera.refresh_rate = 10.0
-            i = 0
-            wait_cam = 200 # total wait = wait_cam*task_period = 4 s
+            camera.set_roi(rows=(2, 22)) # skip ceiling lights at the top and the table at the bottom
+            camera.set_chunk_rows(4) # read 4 rows per run, so no run holds up the motor task
+            shoot_at = time.ticks_add(time.ticks_ms(), 4000) # take the picture in 4 s
+            shot_id = 0    # frame count when the picture was requested
+            try: # saves the frames we aim from, unless there's no room for them
+                recorder = frame_log.FrameRecorder('frames.mlx', max_bytes=FRAME_LOG_MAX)
+            except OSError:
+                recorder = None
             t1_state = 1
             
         # State 1: TAKE PICTURE  
         elif (t1_state == 1):
             
-            # Keep trying to get an image
+            if time.ticks_diff(time.ticks_ms(), shoot_at) < 0: # Task 1 isn't run again
+                task1.sleep_until(shoot_at)  # until 4 seconds have passed and a
+                yield 1                      # picture should be taken
+                camera.start_stream() # then keep acquiring frames, a few rows per run
+                shot_id = camera.frame_id
             
-            if i < wait_cam: # cooperatively holds Task 1 in this state until 5 seconds
-                i += 1       # has passed and a picture should be taken
-            else:
-                image = None
-                while not image:
-                    image = camera.get_image_nonblocking() # take picture
+            # Read the next rows of a subpage, if one is ready; this never waits for the
+            # camera. A frame takes several runs to read, so where the turret was is
+            # noted in the run which starts reading it, when the picture was taken
+            if not camera.reading:
+                captured_pos = turret_share.get()
+            camera.stream()
+            
+            if camera.frame_id > shot_id:   # a whole frame has come in since the wait
+                image = camera.latest()     # take picture
+                captured = camera.frame_ms  # and note when
                 t1_state = 2
-            yield 0
+            yield 1
         
         # State 2: DATA PROCESSING
         elif (t1_state == 2):
-            print('FREEZE')                             # runs function in camera class
-            val = camera.get_csv(image, limits=(0, 99)) # to get average hot pixel value
-            my_share.put(round(val*100)) # magnifies pixel value to store as a whole number  
-            print('VAL',val)
-            gc.collect()
-            t1_state = 3
-            yield 0
+            tele.record(telemetry.FREEZE, 1, 2)               # runs function in camera class
+            val = camera.locate_target(image, limits=(0, 99)) # to get average hot pixel value
+            if recorder is not None and (not TRACK or val is None):
+                recorder = save_frame(recorder, camera)
+            if val is None:   # no row was hot enough, so take another picture
+                shot_id = camera.frame_id
+                t1_state = 1
+            else:
+                # pixel value is magnified to store as a whole number
+                targets.put(val, camera.confidence, camera.frame_id, captured, captured_pos)
+                tele.record(telemetry.VAL, 1, 2, captured_pos, val, camera.confidence,
+                            camera.frame_id)
+                if TRACK: # find the target again in the next frame
+                    shot_id = camera.frame_id
+                    t1_state = 1
+                else:
+                    camera.stop_stream()
+                    if recorder is not None:
+                        recorder = close_frames(recorder) # no more frames to save
+                    t1_state = 3
+            yield 2
          
         # State 3: WAIT
         elif (t1_state == 3):
             
-            t1_state = 3 # holds camera task, no more pictures to be taken
-            yield 0
+            task1.suspend() # holds camera task, no more pictures to be taken
+            yield 3
             
 
 def task2_fun():
@@ -106,6 +241,8 @@ def task2_fun():
              Both flywheels are turned on.
              Panning motor turns gun according to setpoint from thermal camera.
              Servo pulls trigger and returns to neutral position.
+             With TRACK set, the panning motor instead follows the target from every
+             frame, and the servo fires whenever the aim has been steady for a while.
     
     """
     
@@ -133,13 +270,59 @@ def task2_fun():
             chan_B = timer.channel(2, pyb.Timer.ENC_AB, pin=pinB)
             enc = encoder_reader.Encoder(pinA, pinB, timer, chan_A, chan_B)
             
-            # Create controller instance, kp = 0.075, ki = 0.001
-            con = motor_controller.Controller(0.075, 0.001, start)
-            
             start = 730       # encoder value for 180 degree turn
-            wait_fire = 350   # total wait = wait_fire*task_period = 3.5 s
+            
+            # Gains found by autotune.py, or the hand-tuned kp = 0.075, ki = 0.001
+            # (then 0.1 for aiming moves) if it hasn't been run
+            gains = autotune.load_gains()
+            
+            # Control loop period: the gains were tuned for 10 ms, and the integral
+            # gain is per period, so it's scaled to suit
+            period = 1000 // LOOP_HZ if LOOP_HZ else 10 # [ms]
+            
+            # Create controller instance, in integer math. Its log keeps the latest
+            # position readings until the gun fires, then 1 s more, to be saved. With a
+            # short period the integral gain is small, and needs finer fractions to
+            # keep within 1% of the tuned value
+            duel_log = response_log.ResponseLog(300, post=100)
+            con = motor_controller.FixedController(gains['k_p'], gains['k_i']*period/10,
+                                                   start, shift=18 if period < 5 else 16,
+                                                   log=duel_log)
+            
+            # Motion profile for the moves: top speed 3000 counts/s, acceleration
+            # 15000 counts/s^2, with velocity and friction feedforward. With a short
+            # period the profile needs finer fractions of a count
+            prof = motion_profile.TrapezoidProfile(3000, 15000, period, k_v=gains['k_v'],
+                                                   k_s=gains['k_s'],
+                                                   shift=10 if period < 5 else 4)
+            
+            # Backlash model between the controller and the motor, which adds a take-up
+            # move when the turret reverses; the width is measured by backlash.py
+            comp = backlash.BacklashCompensator(moe, gains['backlash'])
+            
+            # Turret move for each camera column, measured by aim_table.py, or
+            # 0.075 counts per hundredth of a column if it hasn't been run
+            table = aim_table.load_table()
+            
+            # The control loop itself, run by a timer interrupt at LOOP_HZ so that the
+            # camera can't hold it up; this task just gives it setpoints. Once it starts,
+            # only the loop reads the encoder, and the position is taken from it
+            loop = inner_loop.InnerLoop(enc, con, comp, prof, period*1000,
+                                        kick=int(gains['k_s']))
+            if LOOP_HZ:
+                loop.start()
+            
+            # What the encoder said at the start of this task run, which everything
+            # in the task uses, so they all see the same reading
+            snap = snapshot.Snapshot(enc)
+            
+            seen = targets.version # the camera's targets which have been looked at
+            target = target_queue.Target() # the target being aimed at
             setpoint = start  # define setpoint variable
             moved = 0         # create variable to track number of motor movements
+            aimed_since = None # when the aim error last came within AIM_TOL
+            agreed = 0        # how many pictures taken since then agree
+            fly_off = None    # when to turn the flywheel off after the last shot
             
             # Flywheel PWM Initialization
             enPin_f = pyb.Pin(pyb.Pin.board.PC1, pyb.Pin.OUT_PP) # Initialize pin en_pin
@@ -153,94 +336,187 @@ def task2_fun():
             # Turn on nerf gun flywheel
             fly.set_duty_cycle(50)
             
+            # Trigger servo on PC7, with 50 Hz PWM from timer 8, channel 2
+            pinC7 = pyb.Pin(pyb.Pin.board.PC7, pyb.Pin.OUT_PP) # initialize PC7 for output
+            timmy_s = pyb.Timer(8, freq=50) # Initialize timer
+            ch_s = timmy_s.channel(2, pyb.Timer.PWM, pin=pinC7) # Initialize servo timer channel
+            servo = servo_driver.ServoDriver(pinC7, timmy_s, ch_s)
+            
             t2_state = 1
         
-        # State 1: MOVE/FIRE
+        # State 1: MOVE
         elif (t2_state == 1):
             
-            con.clear_esum(0) # clears esum (for integral control)
-            hold = 0          # reset hold value
-            for i in range(80):
-                moe.set_duty_cycle(con.run(setpoint,enc.read())) # provide PWM to panning motor
-                print(enc.read())
-                if abs( setpoint - enc.read() ) < 10: # if the error is less than 10 encoder
-                    if hold > 4:                      # values, then this if statement is
-                        print('DONE')                 # entered. If the error is less than 10
-                        break                         # for 5 consecutive calls, the control
-                    else:                             # loop breaks.
-                        hold += 1
+            loop.move(setpoint) # plan the move from where the motor is; clears esum
+            i = 0
+            while i < 40:     # allow 40 runs to settle once the profile is finished
+                if not LOOP_HZ: # no timer, so run the control loop once per task run:
+                    loop.tick() # the motor tracks the profile's setpoint, with
+                                # feedforward to do most of the work
+                snap.take()
+                turret_share.put(snap.read()) # for the camera task to note with its pictures
+                con.meas_time(time.ticks_ms()) # log the response
+                con.meas_pos(snap.read())
+                tele.record(telemetry.SAMPLE, 2, 1, snap.read(), setpoint, loop.pwm, con.esum)
+                if loop.done:
+                    i += 1
+                    if abs( setpoint - snap.read() ) < 10 and snap.at_rest(100, 10): # if the error is less
+                        tele.record(telemetry.DONE, 2, 1, snap.read(), setpoint) # than 10 encoder
+                        break             # values and the motor has stopped, the control loop breaks.
                       
-                yield 0
-            moe.set_duty_cycle(0) # set PWM to 0 when motor has reached the setpoint
+                yield 1
+            loop.release() # set PWM to 0 when motor has reached the setpoint
             old_sp = setpoint
-            t2_state = 2
-            n = 0
             
             if moved == 1: # only happens after the motor has made its aim correction
-                
-                time.sleep_ms(100)
-                pinC7 = pyb.Pin(pyb.Pin.board.PC7, pyb.Pin.OUT_PP) # initialize PC7 for output
-                pinC7.value(0)
-                time.sleep_ms(20)
-                
-                # 20 ms pulse with 2 ms high - pull trigger in
-                pinC7.value(1)
-                time.sleep_us(2000)
-                pinC7.value(0)
-                time.sleep_ms(18)
-                
-                # Wait to allow trigger to move through full trigger pull
-                time.sleep_ms(300)
-                
-                # Rapid on-off to interrupt previous signal pulse
-                pinC7.value(1)
-                pinC7.value(0)
-                
-                # 20 ms pulse with 0.5 ms high - release trigger
-                pinC7.value(1)
-                time.sleep_us(500)
-                pinC7.value(0)
-                time.sleep_ms(19)
-                
-                # Wait to allow servo to fully release the trigger
-                time.sleep_ms(100)
-                
-                # Rapid on-off to stop the servo at trigger edge
-                pinC7.value(1)
-                pinC7.value(0)
-                
-                # Wait, then set flywheel to off
-                time.sleep_ms(200)
-                fly.set_duty_cycle(0)
-                moved += 1 # increases moved so that the gun doesn't fire a second time
+                con.log.trigger()        # keep the log from here on for the duel's record
+                servo.fire(delay_ms=100) # pull the trigger once the turret is still
+                tele.record(telemetry.FIRE, 2, 1, snap.read(), setpoint)
+                t2_state = 3
                 
             else:
                 moved += 1 # increases moved so that the firing sequence will happen
                            # after the movement from camera data has occured
+                t2_state = 2
             
-            yield 0
+            yield 1
+        
+        # State 3: FIRE - the servo pulls and releases the trigger while the other
+        # task keeps running, then the flywheel is turned off. Logging goes on until
+        # the log has the second after the shot, which is then saved
+        elif (t2_state == 3):
+            
+            if not LOOP_HZ:
+                loop.tick() # keep reading the encoder, with the motor released
+            snap.take()
+            turret_share.put(snap.read())
+            con.meas_time(time.ticks_ms()) # keep logging through the shot
+            con.meas_pos(snap.read())
+            tele.record(telemetry.SAMPLE, 2, 3, snap.read(), setpoint, loop.pwm, con.esum)
+            
+            if servo.update():   # still pulling or releasing the trigger
+                fly_off = time.ticks_add(time.ticks_ms(), 200)
+            elif fly_off is not None and time.ticks_diff(time.ticks_ms(), fly_off) >= 0:
+                fly.set_duty_cycle(0)   # wait, then set flywheel to off
+                fly_off = None
+                print_report(loop, snap)
+            elif fly_off is None and con.log.frozen: # the log has the second after the shot
+                save_duel(con.log) # and is then ready for the next duel
+                moved += 1 # increases moved so that the gun doesn't fire a second time
+                t2_state = 2
+            yield 3
         
         # State 2: WAIT
         elif (t2_state == 2):
             
-            if n < wait_fire: # cooperatively holds motor task for 5 seconds until
-                n += 1        # the camera has taken its picture and processed the data
+            if targets.version == seen: # Task 2 isn't run again until the camera has
+                task2.wait_for(targets, seen) # taken its picture and processed the data
             else:
-                val = my_share.get() # assigns share data as val
-                
-                # Translation of camera data to new setpoint
-                if val < 1450:
-                    setpoint = enc.read()+0.055*(val-1450) # Calibration for moving left
-                else:
-                    setpoint = enc.read()+0.075*(val-1450) # Calibration for moving right
-                print('SP',setpoint)
-                con.set_Ki(0.1) # Set higher ki value for smaller movements
-                t2_state = 1
-            yield 0
+                seen = targets.version
+                # Only the newest target matters; one which has waited too long is
+                # thrown away, and task 2 waits for the next
+                if targets.get_latest(target, MAX_TARGET_AGE):
+                    if not LOOP_HZ:
+                        loop.tick()
+                    snap.take()
+                    # Translation of camera data to a turret move from where the turret
+                    # was when the picture was taken, less however far it has turned
+                    # since, and then to a setpoint which allows for backlash if the
+                    # move reverses direction
+                    move = table.lookup(target.col) - (snap.read() - target.pos)
+                    setpoint = comp.aim(snap.read(), move)
+                    tele.record(telemetry.SP, 2, 2, snap.read(), setpoint, target.age_ms(),
+                                target.frame_id)
+                    con.set_Ki(gains['k_i_aim']*period/10) # Set ki value for smaller movements
+                    if TRACK and moved == 1: # follow the target from here on
+                        loop.move(setpoint)
+                        aimed_since = None
+                        t2_state = 4
+                    else:
+                        t2_state = 1
+            yield 2
+        
+        # State 4: TRACK - every new target moves the setpoint, without waiting for
+        # the motor to settle, and the gun fires once the aim error has stayed small
+        # for AIM_HOLD_MS. The motor is held on the target throughout
+        elif (t2_state == 4):
+            
+            if not LOOP_HZ:
+                loop.tick()
+            snap.take()
+            turret_share.put(snap.read())
+            now = time.ticks_ms()
+            con.meas_time(now)
+            con.meas_pos(snap.read())
+            tele.record(telemetry.SAMPLE, 2, 4, snap.read(), setpoint, loop.pwm, con.esum)
+            
+            fresh = False
+            if targets.version != seen:
+                seen = targets.version
+                if targets.get_latest(target, MAX_TARGET_AGE):
+                    fresh = True
+                    move = table.lookup(target.col) - (snap.read() - target.pos)
+                    new_sp = comp.aim(snap.read(), move)
+                    if abs(new_sp - setpoint) > loop.tol: # not just camera noise
+                        setpoint = new_sp
+                        loop.move(setpoint)
+            
+            # The aim error is how far the turret is from where the latest frame says
+            # the target is. A frame takes a while to be read, so the aim only counts
+            # as steady once pictures taken since it came within AIM_TOL agree; two
+            # of them, as the first may have half its pixels from before
+            if abs(setpoint - snap.read()) <= AIM_TOL:
+                if aimed_since is None:
+                    aimed_since = now
+                    agreed = 0
+                elif fresh and time.ticks_diff(target.time, aimed_since) >= 0:
+                    agreed += 1
+            else:
+                aimed_since = None
+            
+            if servo.update():   # still pulling or releasing the trigger
+                if servo.shots == TRACK_SHOTS:
+                    fly_off = time.ticks_add(now, 200)
+            elif (servo.shots < TRACK_SHOTS and aimed_since is not None and agreed >= 2
+                  and time.ticks_diff(now, aimed_since) >= AIM_HOLD_MS):
+                tele.record(telemetry.FIRE, 2, 4, snap.read(), setpoint)
+                con.log.trigger() # keep the log from here on for the duel's record
+                servo.fire()
+                aimed_since = None # the next shot needs the aim steady again
+            elif fly_off is not None and time.ticks_diff(now, fly_off) >= 0:
+                fly.set_duty_cycle(0) # turn the flywheel off after the last shot
+                fly_off = None
+                print_report(loop, snap)
+            
+            if con.log.frozen: # the log has the second after the first shot of a run
+                save_duel(con.log)
+            yield 4
 
  
-# This share holds a signed short (16-bit) integer
-my_share = task_share.Share ('h', name="My Share")
+def task3_fun():
+    """!
+    @brief   Sends telemetry to the PC.
+    @details Writes out the records the other tasks have made, in bulk, at the lowest
+             priority so that it only runs when neither of them needs to.
+    """
+    
+    while(True):
+        tele.drain()
+        yield 0
+
+ 
+# Telemetry records of what the tasks are doing, sent to the PC by task 3 rather
+# than printed from inside the control loop; decode them with telemetry.py. They go
+# out on their own UART, while the report after the shot is printed as text
+tele = telemetry.Telemetry(128, stream=pyb.UART(TELE_UART, TELE_BAUD))
+
+# This queue carries the camera's targets, with when and where each picture was
+# taken; it counts its updates, so task 2 can wait for a new one
+targets = target_queue.TargetQueue(4, name="Targets")
+
+# This share holds the panning encoder's latest position, for task 1 to note when
+# a picture comes in
+turret_share = task_share.Share('l', name="Turret")
  
 # In another task, read data from the share
 
@@ -251,11 +527,23 @@ t2_state = 0
 # allocated for state transition tracing, and the application will run out
 # of memory after a while and quit. Therefore, use tracing only for 
 # debugging and set trace to False when it's not needed
-task1 = cotask.Task(task1_fun, name="Task_1", priority=2, period=20)
-task2 = cotask.Task(task2_fun, name="Task_2", priority=1, period=10)
+# The tasks can sleep until a time or until the share is written, and aren't run
+# while they wait
+task1 = task_wait.WaitTask(task1_fun, name="Task_1", priority=2, period=20)
+task2 = task_wait.WaitTask(task2_fun, name="Task_2", priority=1, period=10)
+task3 = task_wait.WaitTask(task3_fun, name="Task_3", priority=0, period=50)
 
 cotask.task_list.append(task1)
 cotask.task_list.append(task2)
+cotask.task_list.append(task3)
+
+# Time every run of each task, by state; the tasks yield the state they just ran.
+# The figures are printed after the shot, or from the REPL after ^C with
+# profiler.print_report()
+profiler = sched_profile.SchedProfiler()
+profiler.add(task1)
+profiler.add(task2)
+profiler.add(task3)
 
 # Run the memory garbage collector to ensure memory is as defragmented as
 # possible before the real-time scheduler is started
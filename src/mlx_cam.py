@@ -21,11 +21,31 @@
 #  @copyright (c) 2022-2023 by the authors and released under the GNU Public
 #      License, version 3.
 
-import utime as time
-from machine import Pin, I2C
-from mlx90640 import MLX90640
-from mlx90640.calibration import NUM_ROWS, NUM_COLS, IMAGE_SIZE, TEMP_K
-from mlx90640.image import ChessPattern, InterleavedPattern
+from array import array
+
+# Off the board, as when replaying logged frames on a PC (see frame_log.py),
+# there's no camera driver and only the image processing methods can be used
+try:
+    import utime as time
+    from machine import Pin, I2C
+    from mlx90640 import MLX90640
+    from mlx90640.calibration import NUM_ROWS, NUM_COLS, IMAGE_SIZE, TEMP_K
+    from mlx90640.image import ChessPattern, InterleavedPattern
+except ImportError:
+    MLX90640 = None
+    NUM_ROWS = 24
+    NUM_COLS = 32
+    IMAGE_SIZE = NUM_ROWS * NUM_COLS
+    ChessPattern = "ChessPattern"
+    InterleavedPattern = "InterleavedPattern"
+
+
+## The address in the camera's RAM of the first pixel's data word
+RAM_ADDR = 0x0400
+## The address of the camera's status register
+STATUS_ADDR = 0x8000
+## The bit in the status register which is set when a subpage is in RAM
+NEW_DATA = 0x0008
 
 
 ## @brief   Class which wraps an MLX90640 thermal infrared camera driver to
@@ -37,7 +57,9 @@ class MLX_Cam:
 
     ## @brief   Set up an MLX90640 camera.
     #  @param   i2c An I2C bus which has been set up to talk to the camera;
-    #           this must be a bus object which has already been set up
+    #           this must be a bus object which has already been set up. Use
+    #           @c None for an object which only processes images that came
+    #           from somewhere else, such as a frame log
     #  @param   address The address of the camera on the I2C bus (default 0x33)
     #  @param   pattern The way frames are interleaved, as we read only half
     #           the pixels at a time (default ChessPattern)
@@ -58,16 +80,78 @@ class MLX_Cam:
         self._height = height
         ## Tracks whether an image is currently being retrieved
         self._getting_image = False
-        ## Which subpage (checkerboard half) of the image is being retrieved
+        ## Which subpage (checkerboard half) of the image was last measured
         self._subpage = 0
+        ## Set when subpage 0 of the image being retrieved has been measured
+        self._got = 0
+        ## Whether each subpage is returned as soon as it has been measured
+        self._by_subpage = False
+        ## First row, and one past the last row, of the region of interest
+        self._row0 = 0
+        self._row1 = height
+        ## First column, and one past the last column, of the region of
+        #  interest, counted as the camera counts them (not mirrored)
+        self._col0 = 0
+        self._col1 = width
+        ## Buffer for one row of pixel data words read from the camera's RAM
+        self._row_buf = bytearray(2 * width)
+        ## The part of the row buffer holding columns in the region of interest
+        self._row_view = memoryview(self._row_buf)
+        ## Buffer holding the camera's status register
+        self._status = bytearray(2)
+        ## The most rows read from the camera's RAM in one call to
+        #  @c _acquire(), or 0 to read the whole region of interest at once
+        self._chunk_rows = 0
+        ## The next row to read of an image being read in chunks, or -1 when
+        #  no image is part way through being read
+        self._next_row = -1
 
         # The MLX90640 object that does the work
-        self._camera = MLX90640(i2c, address)
-        self._camera.set_pattern(pattern)
-        self._camera.setup()
-
-        ## A local reference to the image object within the camera driver
-        self._image = self._camera.raw
+        if i2c is not None:
+            self._camera = MLX90640(i2c, address)
+            self._camera.set_pattern(pattern)
+            self._camera.setup()
+
+            ## A local reference to the image object within the camera driver
+            self._image = self._camera.raw
+
+        ## The brightest raw value in each row, filled in by locate_target()
+        self._row_max = array('h', [0] * height)
+        ## The (mirrored) column of the brightest pixel in each row
+        self._row_col = array('h', [0] * height)
+        ## The number of hot rows found by the latest locate_target()
+        self.hot_rows = 0
+        ## The percentage of rows searched by the latest locate_target() which
+        #  were hot
+        self.confidence = 0
+
+        ## Two frame buffers used in turn by stream(); one holds the latest
+        #  complete frame while the other is being filled
+        self._frames = (array('h', [0] * (width * height)),
+                        array('h', [0] * (width * height)))
+        ## Zero-copy views of each row of each frame buffer, made once here
+        #  so that getting at a row doesn't allocate anything
+        self._row_views = (self._make_row_views(self._frames[0]),
+                           self._make_row_views(self._frames[1]))
+        ## Index of the buffer holding the latest complete frame
+        self._front = 0
+        ## Whether stream() is acquiring frames
+        self._streaming = False
+        ## Count of complete frames acquired by stream(), 0 before the first
+        self.frame_id = 0
+        ## The time in ms, from @c utime.ticks_ms(), at which the camera was
+        #  found to have measured the latest streamed frame, which is when
+        #  reading it began
+        self.frame_ms = 0
+        ## When reading the image now being read began, for @c frame_ms
+        self._read_ms = 0
+        ## In subpage mode, the subpage measured for the latest frame; @c None
+        #  when frames are only returned once both subpages are in
+        self.frame_subpage = None
+
+        ## The AsciiView objects used by ascii_image() and ascii_art(), made
+        #  when first needed so their buffers are only allocated if used
+        self._ascii_views = {}
 
 
     ## @brief   Show low-resolution camera data as shaded pixels on a text
@@ -92,6 +176,11 @@ class MLX_Cam:
     #           After the printing is done, character color is reset to a
     #           default of medium-brightness green, or something else if
     #           chosen.
+    #
+    #           The whole image is put together in a buffer and sent to the
+    #           console in one write by an @c AsciiView, which is kept for the
+    #           next call; use an @c AsciiView directly for a live view which
+    #           only redraws the pixels that changed.
     #  @param   array An array of (self._width * self._height) pixel values
     #  @param   pixel Text which is shown for each pixel, default being a pair
     #           of extended-ASCII blocks (code 219)
@@ -101,14 +190,12 @@ class MLX_Cam:
     #           0 to 255
     def ascii_image(self, array, pixel="██", textcolor="0;180;0"):
 
-        minny = min(array)
-        scale = 255.0 / (max(array) - minny)
-        for row in range(self._height):
-            for col in range(self._width):
-                pix = int((array[row * self._width + (self._width - col - 1)]
-                           - minny) * scale)
-                print(f"\033[38;2;{pix};{pix};{pix}m{pixel}", end='')
-            print(f"\033[38;2;{textcolor}m")
+        view = self._ascii_views.get('image')
+        if view is None or view.pixel != pixel or view.textcolor != textcolor:
+            view = AsciiView(self, art=False, pixel=pixel, textcolor=textcolor,
+                             levels=256)
+            self._ascii_views['image'] = view
+        view.show(array)
 
 
     ## A "standard" set of characters of different densities to make ASCII art
@@ -118,24 +205,16 @@ class MLX_Cam:
     ## @brief   Show a data array from the IR image as ASCII art.
     #  @details Each character is repeated twice so the image isn't squished
     #           laterally. A code of "><" indicates an error, probably caused
-    #           by a bad pixel in the camera. 
+    #           by a bad pixel in the camera. As with @c ascii_image(), the
+    #           picture is sent in one write by an @c AsciiView.
     #  @param   array The array to be shown, probably @c image.v_ir
     def ascii_art(self, array):
 
-        scale = len(MLX_Cam.asc) / (max(array) - min(array))
-        offset = -min(array)
-        for row in range(self._height):
-            line = ""
-            for col in range(self._width):
-                pix = int((array[row * self._width + (self._width - col - 1)]
-                           + offset) * scale)
-                try:
-                    the_char = MLX_Cam.asc[pix]
-                    print(f"{the_char}{the_char}", end='')
-                except IndexError:
-                    print("><", end='')
-            print('')
-        return
+        view = self._ascii_views.get('art')
+        if view is None:
+            view = AsciiView(self, art=True)
+            self._ascii_views['art'] = view
+        view.show(array)
 
 
     ## @brief   Generate a string containing image data in CSV format.
@@ -148,22 +227,24 @@ class MLX_Cam:
     def get_csv(self, array, limits=None):
 
         if limits and len(limits) == 2:
-            scale = (limits[1] - limits[0]) / (max(array) - min(array))
-            offset = limits[0] - min(array)
+            minny, maxxy = self._min_max(array)
+            scale = (limits[1] - limits[0]) / (maxxy - minny)
+            offset = limits[0] - minny
         else:
             offset = 0.0
             scale = 1.0
+        first_col = self._width - self._col1
         hot = []
-        for row in range(self._height):
+        for row in range(self._row0, self._row1):
             line = ""
             maxm = 0
-            for col in range(self._width):
+            for col in range(first_col, self._width - self._col0):
                 pix = int((array[row * self._width + (self._width - col - 1)]
                           + offset) * scale)
                 if pix > maxm:
                     maxm = pix
                     pos = col
-                if col:
+                if col != first_col:
                     line += ","
                 line += f"{pix}"
             # Initialize maximum element
@@ -174,6 +255,338 @@ class MLX_Cam:
         return avg
 
 
+    ## @brief   Find the column of the hottest object in an image in a single
+    #           pass, for aiming.
+    #  @details This does the job of @c get_csv() without building any CSV
+    #           text. One pass over the pixels finds the image minimum and
+    #           maximum along with the hottest column of each row; then each
+    #           row's hottest pixel is scaled to @c limits and compared with
+    #           @c threshold using integer math, so the same rows count as hot
+    #           as in @c get_csv(). Columns are counted from the same
+    #           (mirrored) side as in @c get_csv(). The hottest pixel in a row
+    #           is picked from the raw values, so two pixels which happen to
+    #           scale to the same integer don't tie.
+    #
+    #           Only the region of interest is searched. If @c subpage is
+    #           given, only the pixels measured in that subpage are searched,
+    #           which is half of them; this goes with subpage mode (see
+    #           @c set_subpage_mode() ). The number of hot rows is put in
+    #           @c hot_rows, and the percentage of the rows searched which
+    #           were hot is put in @c confidence. If no row is hot, @c None is
+    #           returned rather than crashing with a divide-by-zero.
+    #
+    #           Nothing is allocated on the heap: the loops are plain
+    #           @c while loops, the per-row results go into preallocated
+    #           arrays and only small integers are returned, so this can run
+    #           every frame without setting off the garbage collector.
+    #  @param   array An array of (self._width * self._height) pixel values
+    #  @param   limits A 2-iterable containing the minimum and maximum values
+    #           to which the data is scaled before applying the threshold, or
+    #           @c None to use the raw pixel values (default (0, 99))
+    #  @param   threshold The scaled value a row's hottest pixel must reach for
+    #           that row to count as containing the target (default 80)
+    #  @param   subpage The subpage whose pixels are to be searched, usually
+    #           @c frame_subpage, or @c None to search all pixels (default)
+    #  @returns The average hot column in hundredths of a column, or @c None
+    #           if no row is hot
+    def locate_target(self, array, limits=(0, 99), threshold=80,
+                      subpage=None):
+
+        width = self._width
+        col0 = self._col0
+        col1 = self._col1
+        row0 = self._row0
+        row1 = self._row1
+        row_step = 1
+        col_step = 1
+        chess = False
+        if subpage is not None:
+            # ChessPattern subpages are the two colors of a checkerboard;
+            # InterleavedPattern subpages are alternate rows
+            if self._pattern is ChessPattern:
+                chess = True
+                col_step = 2
+            else:
+                row0 += (row0 + subpage) & 1
+                row_step = 2
+
+        minny = 32767
+        maxxy = -32768
+        row_max = self._row_max
+        row_col = self._row_col
+        row = row0
+        while row < row1:
+            base = row * width
+            col = col0 + ((row + col0 + subpage) & 1) if chess else col0
+            best = array[base + col]
+            pos = col
+            while col < col1:
+                pix = array[base + col]
+                # Ties go to the highest raw column, which is the lowest
+                # mirrored column, matching the strict '>' in get_csv()
+                if pix >= best:
+                    best = pix
+                    pos = col
+                if pix < minny:
+                    minny = pix
+                col += col_step
+            row_max[row] = best
+            row_col[row] = width - pos - 1
+            if best > maxxy:
+                maxxy = best
+            row += row_step
+
+        # Compare (pix + offset) * scale >= threshold without dividing, where
+        # scale = (hi - lo) / (maxxy - minny) and offset = lo - minny
+        if limits and len(limits) == 2:
+            num = limits[1] - limits[0]
+            den = maxxy - minny
+            offset = limits[0] - minny
+        else:
+            num = den = 1
+            offset = 0
+        rows = 0
+        hot = 0
+        col_sum = 0
+        row = row0
+        while row < row1:
+            rows += 1
+            if den > 0 and (row_max[row] + offset) * num >= threshold * den:
+                hot += 1
+                col_sum += row_col[row]
+            row += row_step
+
+        self.hot_rows = hot
+        if not hot:
+            self.confidence = 0
+            return None
+        self.confidence = hot * 100 // rows
+        return (col_sum * 100 + hot // 2) // hot
+
+
+    ## @brief   Make a tuple of memoryviews, one for each row of a frame.
+    #  @param   frame An array of (self._width * self._height) pixel values
+    #  @returns A tuple of @c self._height memoryviews into @c frame
+    def _make_row_views(self, frame):
+
+        view = memoryview(frame)
+        return tuple(view[row * self._width:(row + 1) * self._width]
+                     for row in range(self._height))
+
+
+    ## @brief   Get one row of the latest complete image without copying it.
+    #  @param   row The row number, from 0 to self._height - 1
+    #  @returns A memoryview of the row within the front frame buffer
+    def row(self, row):
+
+        return self._row_views[self._front][row]
+
+
+    ## @brief   Find the lowest and highest pixel values in the region of
+    #           interest of an image.
+    #  @param   array An array of (self._width * self._height) pixel values
+    #  @returns A tuple (minimum, maximum)
+    def _min_max(self, array):
+
+        minny = maxxy = array[self._row0 * self._width + self._col0]
+        for row in range(self._row0, self._row1):
+            base = row * self._width
+            for idx in range(base + self._col0, base + self._col1):
+                pix = array[idx]
+                if pix < minny:
+                    minny = pix
+                elif pix > maxxy:
+                    maxxy = pix
+        return minny, maxxy
+
+
+    ## @brief   Choose the region of interest, the part of each image which
+    #           is read from the camera and processed.
+    #  @details Rows and columns outside the region aren't read over I2C and
+    #           are skipped by all the processing functions, so the time taken
+    #           for each image shrinks along with the region. Pixels outside
+    #           the region keep whatever values they had before. Columns are
+    #           given here as the camera counts them; the processing functions
+    #           still report mirrored columns counted across the whole width
+    #           of the image, so shrinking the region doesn't shift the aim.
+    #  @param   rows A 2-iterable holding the first row and one past the last
+    #           row to be used, or @c None to use all the rows
+    #  @param   cols A 2-iterable holding the first column and one past the
+    #           last column to be used, or @c None to use all the columns
+    def set_roi(self, rows=None, cols=None):
+
+        row0, row1 = rows if rows else (0, self._height)
+        col0, col1 = cols if cols else (0, self._width)
+        if not (0 <= row0 < row1 <= self._height
+                and 0 <= col0 < col1 <= self._width):
+            raise ValueError("Region of interest must be inside the image")
+        self._row0 = row0
+        self._row1 = row1
+        self._col0 = col0
+        self._col1 = col1
+        self._row_view = memoryview(self._row_buf)[:2 * (col1 - col0)]
+        self._next_row = -1   # an image part way through is read again
+
+
+    ## @brief   Choose how many rows of an image are read from the camera each
+    #           time the camera task runs.
+    #  @details Reading the whole region of interest takes one I2C transaction
+    #           per row, about 1.6 ms each at 400 kHz, so 20 rows hold up the
+    #           scheduler for over 30 ms, longer than the motor task's period.
+    #           With a chunk size set, @c stream() and
+    #           @c get_image_nonblocking() read at most that many rows each
+    #           time they're called and carry on from the next row on the next
+    #           call, so no one task run takes long. The image isn't
+    #           available until its last chunk has been read, so the chunks
+    #           should be big enough for the whole image to be read before the
+    #           camera measures the next subpage: at a 10 Hz refresh rate and
+    #           a 20 ms task period, 4 rows at a time reads 20 rows in 100 ms.
+    #  @param   rows The most rows to read at once, or 0 to read the whole
+    #           region of interest in one call
+    def set_chunk_rows(self, rows):
+
+        if rows < 0:
+            raise ValueError("Chunk size can't be negative")
+        self._chunk_rows = rows
+
+
+    ## @brief   Tell whether an image is part way through being read in chunks.
+    @property
+    def reading(self):
+
+        return self._next_row >= 0
+
+
+    ## @brief   Check the camera's status register for a newly measured
+    #           subpage.
+    #  @returns The number of the subpage waiting in the camera's RAM, or -1
+    #           if no new data has come in
+    def _poll(self):
+
+        self._i2c.readfrom_mem_into(self._addr, STATUS_ADDR, self._status,
+                                    addrsize=16)
+        if not self._status[1] & NEW_DATA:
+            return -1
+        return self._status[1] & 0x01
+
+
+    ## @brief   Tell the camera that the data in its RAM has been used, so it
+    #           can flag the next subpage when that one has been measured.
+    def _ack(self):
+
+        self._status[1] &= ~NEW_DATA
+        self._i2c.writeto_mem(self._addr, STATUS_ADDR, self._status,
+                              addrsize=16)
+
+
+    ## @brief   Read rows of the region of interest from the camera's RAM
+    #           into a frame buffer.
+    #  @details Each row in the region is read in one I2C transaction which
+    #           covers only the columns in the region, into a preallocated
+    #           buffer. The camera sends each pixel as a big-endian 16-bit
+    #           word, which is stored as a signed value straight into the
+    #           frame buffer's view of that row.
+    #  @param   buf_num The number (0 or 1) of the frame buffer to fill
+    #  @param   row0 The first row to read
+    #  @param   row1 One past the last row to read
+    def _read_rows(self, buf_num, row0, row1):
+
+        buf = self._row_buf
+        view = self._row_view
+        nbytes = len(view)
+        views = self._row_views[buf_num]
+        for row in range(row0, row1):
+            dest = views[row]
+            col = self._col0
+            self._i2c.readfrom_mem_into(self._addr,
+                                        RAM_ADDR + row * self._width + col,
+                                        view, addrsize=16)
+            for k in range(0, nbytes, 2):
+                word = (buf[k] << 8) | buf[k + 1]
+                dest[col] = word - 0x10000 if word & 0x8000 else word
+                col += 1
+
+
+    ## @brief   Take one step toward getting a complete image into the back
+    #           frame buffer, without waiting for the camera.
+    #  @details An image needs both subpages to have been measured. The
+    #           camera only writes the pixels of the subpage it has just
+    #           measured, so once subpage 1 is in, its RAM holds the whole
+    #           image and is read then; subpage 0 only has to be acknowledged.
+    #           In subpage mode the RAM is read after every subpage instead.
+    #           If a chunk size has been set with @c set_chunk_rows(), only
+    #           that many rows are read each call, and later calls go on
+    #           reading the image rather than checking the camera. The
+    #           subpage is acknowledged as soon as it's found, so one which is
+    #           measured while the image is being read isn't missed. When an
+    #           image has been read the two frame buffers swap roles.
+    #  @returns @c True if a new image has just been put in the front buffer
+    def _acquire(self):
+
+        if self._next_row >= 0:
+            return self._read_chunk()
+
+        subpage = self._poll()
+        if subpage < 0:
+            return False
+        self._subpage = subpage
+
+        if not self._by_subpage:
+            # Subpage 1 measured before subpage 0 of this image doesn't count
+            if subpage == 0 or not self._got:
+                self._got = 1 - subpage
+                self._ack()
+                return False
+            self._got = 0
+
+        self._ack()
+        self._read_ms = time.ticks_ms()
+        self._next_row = self._row0
+        return self._read_chunk()
+
+
+    ## @brief   Read the next chunk of the image being read into the back
+    #           frame buffer, swapping the buffers once the last row is in.
+    #  @returns @c True if the image has just been finished
+    def _read_chunk(self):
+
+        row0 = self._next_row
+        row1 = self._row1
+        if self._chunk_rows and row0 + self._chunk_rows < row1:
+            row1 = row0 + self._chunk_rows
+        self._read_rows(self._front ^ 1, row0, row1)
+        if row1 < self._row1:
+            self._next_row = row1
+            return False
+
+        self._next_row = -1
+        self._front ^= 1
+        self.frame_id += 1
+        self.frame_ms = self._read_ms
+        self.frame_subpage = self._subpage if self._by_subpage else None
+        return True
+
+
+    ## @brief   Choose whether images are returned after each subpage rather
+    #           than after both subpages have been measured.
+    #  @details In subpage mode, @c get_image_nonblocking() and @c stream()
+    #           produce an image each time the camera measures a subpage, so
+    #           images come twice as often and each is one subpage newer.
+    #           Only half the pixels in each image are new; the others were
+    #           measured one subpage earlier. @c frame_subpage tells which
+    #           half is new, and passing it to @c locate_target() searches
+    #           just the new pixels, halving the processing time as well.
+    #           This makes the faster camera refresh rates worth using for
+    #           aiming.
+    #  @param   enable @c True for subpage mode, @c False for whole images
+    def set_subpage_mode(self, enable):
+
+        self._by_subpage = enable
+        self._got = 0
+        self._next_row = -1
+        self.frame_subpage = None
+
+
     ## @brief   Get one image from a MLX90640 camera, @b blocking other tasks
     #           from running until the image has been received.
     #  @details Grab one image from the given camera and return it. Both
@@ -181,14 +594,15 @@ class MLX_Cam:
     #           grabbed and combined (maybe; this is the raw version, so the
     #           combination is sketchy and not fully tested). It is assumed
     #           that the camera is in the ChessPattern (default) mode as it
-    #           probably should be.
-    #  @returns A reference to the image object we've just filled with data
+    #           probably should be. Only the region of interest is read.
+    #  @returns A reference to the frame buffer we've just filled with data
     def get_image(self):
 
-        for subpage in (0, 1):
-            while not self._camera.has_data:
+        image = self.get_image_nonblocking()
+        while not image:
+            if not self.reading:   # no need to wait between chunks
                 time.sleep_ms(50)
-            image = self._camera.read_image(subpage)
+            image = self.get_image_nonblocking()
 
         return image
 
@@ -197,6 +611,8 @@ class MLX_Cam:
     #  @details This function is to be called repeatedly; it will return @c None
     #           until a complete image has been retrieved (this takes around a
     #           quarter to half second) and will then return the image.
+    #           Only the region of interest is read from the camera. The
+    #           image is one of the frame buffers also used by @c stream().
     #
     #      @b Example: This code would be inside a task function which yields 
     #      repeatedly as long as there isn't a complete image available.
@@ -211,23 +627,271 @@ class MLX_Cam:
 
         # If this is the first recent call, begin the process
         if not self._getting_image:
-            self._subpage = 0
+            self._got = 0
+            self._next_row = -1
             self._getting_image = True
         
-        # Read whichever subpage needs to be read, or wait until data is ready
-        if not self._camera.has_data:
+        # Check for a subpage, reading the image once both are in
+        if not self._acquire():
             return None
         
-        image = self._camera.read_image(self._subpage)
-        
-        # If we just got subpage zero, we need to come back and get subpage 1;
-        # if we just got subpage 1, we're done
-        if self._subpage == 0:
-            self._subpage = 1
+        self._getting_image = False
+        return self._frames[self._front]
+
+
+    ## @brief   Begin continuous acquisition of images into a pair of
+    #           preallocated frame buffers.
+    #  @details After this has been called, @c stream() should be called
+    #           each time the camera task runs. Each complete image goes into
+    #           the buffer which isn't holding the latest frame, and the two
+    #           buffers then swap roles, so @c latest() always refers to a
+    #           whole frame without the data having to be copied.
+    def start_stream(self):
+
+        self._got = 0
+        self._next_row = -1
+        self._getting_image = False
+        self._streaming = True
+
+
+    ## @brief   Stop continuous acquisition; the latest frame stays available.
+    def stop_stream(self):
+
+        self._streaming = False
+
+
+    ## @brief   Deal with one subpage of a streamed image if the camera has
+    #           one.
+    #  @details This function never waits for the camera, so a task can call
+    #           it and yield every time it runs. When the second subpage is
+    #           in, the region of interest is read into the back buffer, in
+    #           chunks over several calls if @c set_chunk_rows() has been
+    #           used, then the buffers are swapped and @c frame_id is
+    #           incremented.
+    #
+    #      @b Example: This code would be inside a camera task function.
+    #      @code
+    #      camera.start_stream()
+    #      while True:
+    #          if camera.stream():
+    #              val = camera.locate_target(camera.latest())
+    #          yield(state)
+    #      @endcode
+    #  @returns @c True if a new complete frame has just become available
+    def stream(self):
+
+        if not self._streaming:
+            return False
+        return self._acquire()
+
+
+    ## @brief   Get the latest complete image acquired by @c stream().
+    #  @details The array returned is one of the camera's own frame buffers,
+    #           not a copy. It stays intact until @c stream() has completed
+    #           another frame, so it should be used before the task yields.
+    #  @returns An array of (self._width * self._height) pixel values, or
+    #           @c None if no frame has been streamed yet
+    def latest(self):
+
+        if not self.frame_id:
             return None
+        return self._frames[self._front]
+
+
+## @brief   Class which draws camera images on a text console quickly enough
+#           to leave a live view running.
+#  @details Printing an image one pixel at a time with a freshly formatted
+#           escape sequence for each pixel makes the USB serial console the
+#           slowest part of the program. An @c AsciiView instead makes the
+#           text for every shade once, when it's created, then copies those
+#           pieces into a buffer which is allocated once and sends the whole
+#           image to the console in a single write. A color escape sequence is
+#           only sent when the shade changes from that of the pixel before.
+#
+#           In delta mode, the cursor is moved to the top left of the console
+#           at each image and only the pixels whose shade has changed since
+#           the previous image are redrawn, skipping over the rest with cursor
+#           movements; rows with no changes aren't sent at all. The first
+#           image, and the first after the region of interest is changed or
+#           @c invalidate() is called, is drawn in full.
+#
+#           The images are drawn from the camera's region of interest and are
+#           mirrored just as in @c MLX_Cam.ascii_image(). For example, for a
+#           live view in PuTTY:
+#           @code
+#           view = AsciiView(camera, delta=True)
+#           while True:
+#               image = camera.get_image()
+#               view.show(image)
+#           @endcode
+class AsciiView:
+
+    ## @brief   Set up a view, making the text for each shade and the buffer.
+    #  @details The buffer is big enough for the worst case, the whole image
+    #           with a change of shade at every pixel. For a full size
+    #           grayscale image that is around 20 KB, less with fewer
+    #           @c levels; ASCII art needs only a couple of KB.
+    #  @param   camera The MLX_Cam whose images are shown, which sets the image
+    #           size and region of interest
+    #  @param   art @c True for ASCII art made from the characters in
+    #           @c MLX_Cam.asc, or @c False (default) for shaded pixels drawn
+    #           with ANSI escape codes, as @c MLX_Cam.ascii_image() does
+    #  @param   delta @c True to redraw only the pixels which have changed,
+    #           with the image at the top left of the console (default
+    #           @c False)
+    #  @param   stream Where to write the text, usually @c pyb.USB_VCP() or
+    #           @c None (default) for standard output
+    #  @param   pixel Text shown for each pixel when not making ASCII art
+    #  @param   textcolor The color to which text is reset after each image
+    #           when not making ASCII art, as "<r>;<g>;<b>"
+    #  @param   levels The number of shades of gray when not making ASCII art,
+    #           from 2 to 256 (default 64)
+    def __init__(self, camera, art=False, delta=False, stream=None,
+                 pixel="██", textcolor="0;180;0", levels=64):
+
+        import sys
+
+        ## The camera whose images are shown
+        self._camera = camera
+        ## Whether only changed pixels are redrawn
+        self._delta = delta
+        ## The stream to which each image is written
+        self._flush = None
+        if stream is None:
+            stream = sys.stdout
+            if hasattr(stream, 'buffer'):
+                # On a PC, write bytes under the text layer, after what it holds
+                self._flush = stream.flush
+                stream = stream.buffer
+        self._stream = stream
+        ## Text shown for each pixel, and the color after each image
+        self.pixel = pixel
+        self.textcolor = textcolor
+        ## Width of one pixel on the console, in character cells
+        cell = 2 if art else len(pixel)
+
+        if art:
+            # Characters from sparse to dense, then the bad pixel mark; the
+            # shade is (pix - min) * len(asc) // (max - min), so the hottest
+            # pixel gets the mark, as it always has in ascii_art()
+            self._scale = len(MLX_Cam.asc)
+            self._shades = tuple((ch + ch).encode() for ch in MLX_Cam.asc) + (b"><",)
+            self._pixel = b""
+            self._reset = b""
         else:
-            self._getting_image = False
-            return image
+            if not 2 <= levels <= 256:
+                raise ValueError("Levels must be from 2 to 256")
+            self._scale = levels - 1
+            self._shades = tuple(
+                f"\033[38;2;{g};{g};{g}m".encode()
+                for g in (lev * 255 // (levels - 1) for lev in range(levels)))
+            self._pixel = pixel.encode()
+            self._reset = f"\033[38;2;{textcolor}m".encode()
+
+        width = camera._width
+        height = camera._height
+        ## Cursor movements to the start of each row, and to skip pixels
+        self._home = b"\033[H"
+        self._clear = b"\033[2J\033[H"
+        self._row_pos = tuple(f"\033[{row + 1};1H".encode()
+                              for row in range(height))
+        self._skip = (b"",) + tuple(f"\033[{n * cell}C".encode()
+                                    for n in range(1, width + 1))
+        self._newline = b"\r\n"
+
+        # Worst case for each pixel: a skip, a color and the pixel itself
+        longest = (max(len(s) for s in self._shades) + len(self._pixel)
+                   + len(self._skip[-1]))
+        size = (len(self._clear) + len(self._reset) + height
+                * (width * longest + len(self._row_pos[-1]) + len(self._reset)
+                   + len(self._newline)))
+        ## The buffer each image is put together in, and a view of it
+        self._buf = bytearray(size)
+        self._view = memoryview(self._buf)
+        ## The shade of each pixel as last drawn, or -1 if not drawn yet
+        self._prev = array('h', [-1] * (width * height))
+        ## The region of interest the previous image was drawn with
+        self._roi = None
+
+    ## @brief   Forget what is on the console so the next image is drawn in
+    #           full, as after the console has been cleared.
+    def invalidate(self):
+
+        self._roi = None
+
+    ## @brief   Put text in the buffer.
+    #  @param   pos Where in the buffer the text goes
+    #  @param   text The bytes to put there
+    #  @returns The position just past the text
+    def _put(self, pos, text):
+
+        end = pos + len(text)
+        self._buf[pos:end] = text
+        return end
+
+    ## @brief   Draw an image on the console.
+    #  @param   array An array of (width * height) pixel values
+    #  @returns The number of bytes written
+    def show(self, array):
+
+        cam = self._camera
+        width = cam._width
+        row0 = cam._row0
+        row1 = cam._row1
+        col0 = cam._col0
+        col1 = cam._col1
+        minny, maxxy = cam._min_max(array)
+        span = maxxy - minny if maxxy > minny else 1
+        scale = self._scale
+        shades = self._shades
+        pixel = self._pixel
+        prev = self._prev
+        put = self._put
+
+        roi = (row0, row1, col0, col1)
+        delta = self._delta and self._roi == roi
+        self._roi = roi
+
+        pos = 0
+        if self._delta:
+            pos = put(pos, self._home if delta else self._clear)
+        last = -1
+        for row in range(row0, row1):
+            base = row * width
+            skip = 0
+            started = not self._delta
+            for col in range(width - col1, width - col0):
+                shade = (array[base + width - col - 1] - minny) * scale // span
+                if delta and prev[base + col] == shade:
+                    skip += 1
+                    continue
+                prev[base + col] = shade
+                if not started:
+                    pos = put(pos, self._row_pos[row - row0])
+                    started = True
+                if skip:
+                    pos = put(pos, self._skip[skip])
+                    skip = 0
+                if pixel:
+                    if shade != last:
+                        pos = put(pos, shades[shade])
+                        last = shade
+                    pos = put(pos, pixel)
+                else:
+                    pos = put(pos, shades[shade])
+            if not self._delta:
+                pos = put(pos, self._reset)
+                pos = put(pos, self._newline)
+                last = -1
+        if self._delta:
+            pos = put(pos, self._reset)
+            pos = put(pos, self._row_pos[row1 - row0] if row1 - row0 < len(self._row_pos)
+                      else self._newline)
+
+        if self._flush:
+            self._flush()
+        self._stream.write(self._view[:pos])
+        return pos
 
 
 ## This test function sets up the sensor, then grabs and shows an image in a
@@ -0,0 +1,121 @@
+"""!
+@file motion_profile.py
+    This file contains class TrapezoidProfile, which turns a move to a new position into a
+    series of intermediate setpoints, one per control period, with limited speed and
+    acceleration, along with a velocity feedforward term for the motor.
+
+@author Brendan Stratford
+@author Johnathan Waldmire
+@author Jonathan Romeo
+@date   10/18/2026
+"""
+
+class TrapezoidProfile:
+    """!
+    Generates a trapezoidal motion profile: the setpoint speeds up at a constant
+    acceleration to a top speed, cruises, then slows down at the same rate so that it stops
+    exactly on the target. Short moves never reach the top speed and have a triangular speed
+    profile instead. The controller tracks the moving setpoint from position(), and the
+    motor is given feedforward() on top of the controller's output so the controller only
+    has to correct small errors instead of doing all the work.
+
+    The profile is worked out one control period at a time by step(), using integer math
+    with positions and speeds scaled by 2**shift, so it allocates nothing while running.
+    Each period the setpoint moves as fast as it can while still being able to stop by the
+    target.
+    """
+
+    def __init__(self, v_max, a_max, period, k_v=0.0, k_s=0.0, shift=4):
+        """!
+        Set up a profile generator.
+        @param v_max: top speed of the setpoint [encoder counts/s]
+        @param a_max: acceleration and deceleration of the setpoint [encoder counts/s^2]
+        @param period: control period, the time between calls to step() [ms]
+        @param k_v: velocity feedforward gain [% duty cycle per encoder count/s]
+        @param k_s: extra duty cycle given in the direction of motion while the setpoint
+               is moving, to get past static friction [%]
+        @param shift: positions and speeds are kept scaled by 2**shift
+        """
+        self.period = period
+        self.shift = shift
+        scale = 1 << shift
+        ## Top speed [scaled encoder counts per period]
+        self._v_max = max(1, int(v_max * period * scale / 1000))
+        ## Acceleration [scaled encoder counts per period per period]
+        self._a = max(1, int(a_max * period * period * scale / 1000000))
+        ## Feedforward gain [% per scaled encoder count per period, times 2**16]
+        self._k_v = int(round(k_v * 1000 / period / scale * 65536))
+        self._k_s = int(round(k_s))
+        self._pos = 0
+        self._target = 0
+        self._vel = 0
+        self._dir = 0
+        ## True once the setpoint has reached the target
+        self.done = True
+        ## Number of periods since the move was started
+        self.ticks = 0
+
+    def start(self, pos, target):
+        """!
+        Begin a move from standing still.
+        @param pos: where the move starts, usually the encoder reading [encoder counts]
+        @param target: where the move ends [encoder counts]
+        """
+        self._pos = int(pos) << self.shift
+        self._target = int(target) << self.shift
+        self._vel = 0
+        self._dir = 1 if target > pos else -1
+        self.done = self._pos == self._target
+        self.ticks = 0
+
+    def step(self):
+        """!
+        Move the setpoint on by one control period.
+        @return the new setpoint [encoder counts]
+        """
+        if self.done:
+            return self.position()
+        self.ticks += 1
+        left = (self._target - self._pos) * self._dir
+        vel = self._vel
+        a = self._a
+
+        # Take the fastest of speeding up, holding speed or slowing down from which the
+        # setpoint can still stop by the target; moving at speed v then slowing by a each
+        # period covers v * (v + a) / (2 * a) before stopping
+        vel = vel + a if vel < self._v_max else vel
+        if vel > self._v_max:
+            vel = self._v_max
+        while vel > a and vel * (vel + a) > 2 * a * left:
+            vel -= a
+        if vel < a:
+            vel = a
+
+        if vel >= left:
+            self._pos = self._target
+            self._vel = 0
+            self.done = True
+        else:
+            self._pos += vel * self._dir
+            self._vel = vel
+        return self.position()
+
+    def position(self):
+        """!
+        @return the current setpoint [encoder counts]
+        """
+        return self._pos >> self.shift
+
+    def velocity(self):
+        """!
+        @return the current setpoint speed, signed [encoder counts per period]
+        """
+        return (self._vel * self._dir) >> self.shift
+
+    def feedforward(self):
+        """!
+        @return the duty cycle which should move the motor at the setpoint's speed [%]
+        """
+        if self._vel == 0:
+            return 0
+        return self._dir * (((self._vel * self._k_v) >> 16) + self._k_s)
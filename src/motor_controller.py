@@ -7,27 +7,30 @@
 @author Jonathan Romeo
 @date   3/17/2024
 """
+
+import response_log
+
 class Controller:
     """!
     Implements PI control for a DC motor. Gain values and a desired encoder value set point are specified upon initialization. Works with the motor driver class to control the motor PWM signal.
     """
     
-    def __init__(self, k_p, k_i, sp):
+    def __init__(self, k_p, k_i, sp, log=None):
         """!
         Initialize variables and make them discoverable within the class.
-        Create empty lists for time and position.
+        Create a log for time and position.
         @param k_p: proportional gain value
         @param sp setpoint: the angle [encoder counts]
-        @param resp_time: response time list: the time our program has been
-        running. Incremented by .1s from 0s until setpoint is reached.
-        @param resp_pos: response position list: reads encoder position for
-        every response time increment, stored in a list.
+        @param log: a response_log.ResponseLog to keep the times and positions
+        given to meas_time() and meas_pos(), or None for one which keeps the
+        latest 200 of them. The log has a fixed size, so a long run doesn't
+        use up memory.
         """
         self.k_p = k_p
         self.k_i = k_i
         self.sp = sp
-        self.resp_time = []
-        self.resp_pos = []
+        self.log = response_log.ResponseLog(200) if log is None else log
+        self._resp_time = 0
         
     def clear_esum(self, esum):
         """!
@@ -48,6 +51,8 @@ class Controller:
         self.esum += err
         if self.esum > 20000:
             self.esum = 20000
+        elif self.esum < -20000:
+            self.esum = -20000
         
         if abs(err) < 10:
             PWM = self.k_p*(err) - self.k_i*(self.esum)
@@ -81,29 +86,115 @@ class Controller:
         
     def meas_time(self, time):
         """!
-        Measures time by appending the current time to a list of response times.
-        @param time: appends time, corresponding to the utime count every 0.1s
-        (assigned below)
+        Measures time, to go with the next position given to meas_pos().
+        @param time: the current time, such as the utime.ticks_ms() count
         """
-        self.resp_time.append(time) # appends time, corresponding to the
-                                    # utime count every 0.1s (assigned below)
+        self._resp_time = time
         
     def meas_pos(self, pos):
         """!
-        Measures position by recording the encoder's current position, every 0.1s.
+        Measures position by recording the encoder's current position in the log,
+        along with the time last given to meas_time().
         @param pos: found by using the read function of encoder_reader
         """
-        self.resp_pos.append(pos)
+        self.log.record(self._resp_time, pos)
     
     def print_results(self):
         """!
-        Matches time data to position data and prints the two lists when called.
+        Prints every time and position in the log as CSV, with times counted from
+        the first one. The log isn't changed, so this can be called again.
         """
-        init_time = self.resp_time[0]
-        for i in range(len(self.resp_time)-1):
-            self.resp_time[i] -= init_time
-            print(f'{self.resp_time[i]},{self.resp_pos[i]}')
-        
+        self.log.dump(relative=True)
+
+
+class FixedController(Controller):
+    """!
+    Implements the same PI control as Controller using only integer math. On MicroPython
+    every float result is a new object on the heap, so Controller.run() makes garbage on
+    every call; this version keeps the gains as integers scaled by 2**shift and works in
+    small integers throughout, so run() allocates nothing. It is used just like Controller:
+    gains are given and changed in the same units, and run(sp, act) returns the duty cycle
+    for the motor driver, rounded to a whole percent.
+
+    The integral sum is clamped to +/-esum_max in both directions. The products of the
+    gains and errors have to stay below 2**30 to remain small integers; with the default
+    shift of 16 that allows gains up to about 0.8 with errors of a few thousand counts.
+    Small gains, such as integral gains scaled down for a fast loop, lose precision to the
+    rounding instead, so a gain which can't be held to within 1% is warned about; a larger
+    shift fixes that, at the cost of a smaller range.
+    """
+
+    def __init__(self, k_p, k_i, sp, shift=16, esum_max=20000, log=None):
+        """!
+        Initialize the controller, converting the gains to scaled integers.
+        @param k_p: proportional gain value [% per encoder count]
+        @param k_i: integral gain value [% per encoder count]
+        @param sp: setpoint: the angle [encoder counts]
+        @param shift: the gains are scaled by 2**shift
+        @param esum_max: limit on the size of the integral sum [encoder counts]
+        @param log: a response_log.ResponseLog for meas_time() and meas_pos()
+        """
+        super().__init__(k_p, k_i, sp, log)
+        self.shift = shift
+        self.esum_max = esum_max
+        self.esum = 0
+        self._half = 1 << (shift - 1) if shift else 0
+        self.set_Kp(k_p)
+        self.set_Ki(k_i)
+
+    def run(self, sp, act):
+        """!
+        Defines and returns PWM. Takes setpoint and current encoder reading,
+        and returns a PWM signal telling the motor how hard to work to get to the
+        desired position. The integral term changes sign close to the setpoint, as it
+        does in Controller.run().
+        @param sp: setpoint: the desired position [encoder counts]
+        @param act: actual encoder reading [encoder counts]
+        @return the duty cycle [%], as an integer
+        """
+        err = sp - act
+        esum = self.esum + err
+        if esum > self.esum_max:
+            esum = self.esum_max
+        elif esum < -self.esum_max:
+            esum = -self.esum_max
+        self.esum = esum
+
+        if -10 < err < 10:
+            acc = self.kp_fixed * err - self.ki_fixed * esum
+        else:
+            acc = self.kp_fixed * err + self.ki_fixed * esum
+        return (acc + self._half) >> self.shift
+
+    def set_Kp(self, k_p):
+        """!
+        Set a different proportional gain.
+        @param k_p: proportional gain value [% per encoder count]
+        """
+        self.k_p = k_p
+        self.kp_fixed = self._fixed(k_p, 'k_p')
+
+    def set_Ki(self, k_i):
+        """!
+        Set a different integral gain.
+        @param k_i: integral gain value [% per encoder count]
+        """
+        self.k_i = k_i
+        self.ki_fixed = self._fixed(k_i, 'k_i')
+
+    def _fixed(self, gain, name):
+        """!
+        Scale a gain to an integer, warning if rounding changes it by more than 1%.
+        @param gain: the gain [% per encoder count]
+        @param name: what the gain is called, for the warning
+        @return the gain times 2**shift, rounded
+        """
+        fixed = int(round(gain * (1 << self.shift)))
+        if gain and abs(fixed / (1 << self.shift) - gain) > 0.01 * abs(gain):
+            print(f"Warning: {name} = {gain} is {fixed / (1 << self.shift)} with a shift "
+                  f"of {self.shift}; use a larger shift")
+        return fixed
+
 if __name__ == "__main__":
     import motor_driver as moto
     import encoder_reader
@@ -0,0 +1,200 @@
+"""!
+@file response_log.py
+    This file contains class ResponseLog, a fixed size log of (time, value) samples such as
+    a motor's step response, which can be left running for as long as the program runs
+    without using up memory.
+
+@author Brendan Stratford
+@author Johnathan Waldmire
+@author Jonathan Romeo
+@date   10/18/2026
+"""
+
+from array import array
+import utime
+
+## Characters used for each number when a log is dumped, enough for any 32 bit value
+FIELD = 11
+## Number of lines put together before each write when a log is dumped
+BLOCK = 16
+
+
+class ResponseLog:
+    """!
+    Keeps the latest samples of a signed integer value and the time each was taken, in
+    arrays which are allocated once. When the log is full, each new sample overwrites the
+    oldest one. With decimation, only every so many samples offered are kept, so a longer
+    stretch of time fits in the same memory.
+
+    In trigger mode the log records all the time, but once trigger() is called it takes
+    only a set number of further samples and then stops, so it holds what happened just
+    before and just after an event such as the motor settling or the gun firing. Call
+    rearm() to start looking for the next event.
+
+    dump() writes the samples as CSV text through a preallocated buffer, formatting the
+    numbers itself, so a log can be written out at any time without allocating memory.
+    """
+
+    def __init__(self, capacity, decimate=1, post=None):
+        """!
+        @param capacity: the most samples the log holds
+        @param decimate: keep one sample out of every this many offered to record()
+        @param post: in trigger mode, the number of samples kept after the trigger, so the
+               log holds capacity - post samples from before it; None (default) for a log
+               which just keeps the latest samples
+        """
+        if post is not None and not 0 <= post <= capacity:
+            raise ValueError("Samples after the trigger must fit in the log")
+        self.capacity = capacity
+        self.decimate = decimate
+        self.post = post
+        self._times = array('l', [0] * capacity)
+        self._values = array('l', [0] * capacity)
+        self._line = bytearray(BLOCK * (2 * FIELD + 2))
+        self._views = tuple(memoryview(self._line)[:n * (2 * FIELD + 2)]
+                            for n in range(BLOCK + 1))
+        self.clear()
+
+    def clear(self):
+        """!
+        Throw away all the samples and, in trigger mode, wait for a new trigger.
+        """
+        self._next = 0
+        self._count = 0
+        self._skip = 0
+        self._left = -1
+        ## True once a trigger has been seen
+        self.triggered = False
+        ## True once the samples after a trigger have been taken; nothing more is recorded
+        self.frozen = False
+
+    def rearm(self):
+        """!
+        Go back to recording, in trigger mode waiting for a new trigger. The samples already
+        in the log are kept until they are overwritten.
+        """
+        self._left = -1
+        self.triggered = False
+        self.frozen = False
+
+    def record(self, time, value):
+        """!
+        Offer a sample to the log.
+        @param time: when the sample was taken, such as from utime.ticks_ms()
+        @param value: the value to log, such as an encoder reading
+        """
+        if self.frozen:
+            return
+        if self._skip:
+            self._skip -= 1
+            return
+        self._skip = self.decimate - 1
+        idx = self._next
+        self._times[idx] = time
+        self._values[idx] = value
+        idx += 1
+        self._next = 0 if idx == self.capacity else idx
+        if self._count < self.capacity:
+            self._count += 1
+        if self._left > 0:
+            self._left -= 1
+            if self._left == 0:
+                self.frozen = True
+
+    def trigger(self):
+        """!
+        Mark an event. In trigger mode, the log stops once it has taken the set number of
+        samples after this; later triggers are ignored until rearm() is called.
+        """
+        if self.post is None or self.triggered:
+            return
+        self.triggered = True
+        self._left = self.post
+        if self.post == 0:
+            self.frozen = True
+
+    def __len__(self):
+        return self._count
+
+    def _index(self, n):
+        if not 0 <= n < self._count:
+            raise IndexError("log index out of range")
+        idx = self._next - self._count + n
+        return idx + self.capacity if idx < 0 else idx
+
+    def time(self, n):
+        """!
+        @param n: which sample, with 0 the oldest in the log
+        @return the time of that sample
+        """
+        return self._times[self._index(n)]
+
+    def value(self, n):
+        """!
+        @param n: which sample, with 0 the oldest in the log
+        @return the value of that sample
+        """
+        return self._values[self._index(n)]
+
+    def _put(self, pos, num):
+        """!
+        Write a number right-justified in a field of FIELD characters.
+        @return the position just past the field
+        """
+        line = self._line
+        end = pos + FIELD
+        neg = num < 0
+        if neg:
+            num = -num
+        idx = end - 1
+        while True:
+            line[idx] = 48 + num % 10
+            num //= 10
+            idx -= 1
+            if num == 0:
+                break
+        if neg:
+            line[idx] = 45
+            idx -= 1
+        while idx >= pos:
+            line[idx] = 32
+            idx -= 1
+        return end
+
+    def dump(self, stream=None, relative=False):
+        """!
+        Write the samples from oldest to newest as lines of "time,value" text, with each
+        number padded with spaces to the same width. The log isn't changed.
+        @param stream: where to write, such as an open file or @c pyb.USB_VCP(); None
+               (default) for standard output
+        @param relative: True to give times from the oldest sample rather than as recorded;
+               the times must then be utime tick counts, such as from utime.ticks_ms(),
+               as they're subtracted with utime.ticks_diff() to allow for wrap-around
+        """
+        if stream is None:
+            import sys
+            stream = sys.stdout
+            if hasattr(stream, 'buffer'):
+                # On a PC, write bytes under the text layer, after what it holds
+                stream.flush()
+                stream = stream.buffer
+        base = self.time(0) if relative and self._count else 0
+        pos = 0
+        lines = 0
+        for n in range(self._count):
+            idx = self._index(n)
+            time = self._times[idx]
+            if relative:
+                time = utime.ticks_diff(time, base)
+            pos = self._put(pos, time)
+            self._line[pos] = 44
+            pos = self._put(pos + 1, self._values[idx])
+            self._line[pos] = 10
+            pos += 1
+            lines += 1
+            if lines == BLOCK:
+                stream.write(self._views[lines])
+                pos = 0
+                lines = 0
+        if lines:
+            stream.write(self._views[lines])
@@ -0,0 +1,199 @@
+"""!
+@file sched_profile.py
+    This file contains class SchedProfiler, which measures how the cotask scheduler's tasks
+    are keeping to their periods: how long each run of each task takes, how late it starts
+    after its deadline, how often a run takes longer than the task's period, and how the
+    run time is shared among the states of each task, so the state which makes the
+    deadlines get missed can be found.
+
+    Tasks report the state they have just run by yielding its number, as cotask's tracing
+    expects. The profiler doesn't need any change to cotask: it wraps each task's generator
+    in one which times it. The figures are kept in arrays allocated when a task is added,
+    and can be printed at any time, such as from the REPL after ^C:
+    @code
+    >>> profiler.print_report()
+    @endcode
+
+@author Brendan Stratford
+@author Johnathan Waldmire
+@author Jonathan Romeo
+@date   10/18/2026
+"""
+
+from array import array
+import utime
+
+
+class TaskProfile:
+    """!
+    The figures for one task: counts of runs, overruns and missed periods, histograms of
+    run time and start latency with @c bin_us wide bins (the last bin takes anything
+    larger), and for each state the number of runs, total and longest run time and number
+    of overruns. States numbered @c states or more are counted together in the last one.
+    """
+
+    def __init__(self, task, bins=20, bin_us=1000, states=8):
+        """!
+        @param task: the cotask.Task to profile
+        @param bins: number of bins in each histogram
+        @param bin_us: width of each histogram bin [us]
+        @param states: number of states to keep figures for
+        """
+        self.task = task
+        self.name = task.name
+        self.bin_us = bin_us
+        ## Histogram of run times
+        self.run_hist = array('L', [0] * bins)
+        ## Histogram of how late runs start after their deadlines
+        self.late_hist = array('L', [0] * bins)
+        ## Number of runs of each state
+        self.state_runs = array('L', [0] * states)
+        ## Longest run of each state [us]
+        self.state_max = array('L', [0] * states)
+        ## Number of runs of each state which took longer than the task's period
+        self.state_over = array('L', [0] * states)
+        ## Total run time of each state [us]; a list, as the sums outgrow an array
+        self.state_total = [0] * states
+        self.reset()
+
+    def reset(self):
+        """!
+        Clear the figures.
+        """
+        ## Number of runs
+        self.runs = 0
+        ## Total and longest run time [us]
+        self.run_total = 0
+        self.run_max = 0
+        ## Total and longest start latency [us], for runs started by the task's period
+        self.late_total = 0
+        self.late_max = 0
+        self.late_runs = 0
+        ## Number of runs which took longer than the task's period
+        self.overruns = 0
+        ## Number of runs which started a whole period or more late
+        self.missed = 0
+        for hist in (self.run_hist, self.late_hist, self.state_runs, self.state_max,
+                     self.state_over):
+            for n in range(len(hist)):
+                hist[n] = 0
+        for n in range(len(self.state_total)):
+            self.state_total[n] = 0
+
+    def _bin(self, hist, time):
+        idx = time // self.bin_us
+        last = len(hist) - 1
+        hist[idx if idx < last else last] += 1
+
+    def record(self, state, start, runt):
+        """!
+        Count one run of the task.
+        @param state: the state the task yielded
+        @param start: when the run started, from utime.ticks_us()
+        @param runt: how long the run took [us]
+        """
+        task = self.task
+        period = task.period
+        self.runs += 1
+        self.run_total += runt
+        if runt > self.run_max:
+            self.run_max = runt
+        self._bin(self.run_hist, runt)
+        if period is not None:
+            # The task's next deadline was moved on by a period just before it ran
+            late = utime.ticks_diff(start, utime.ticks_add(task._next_run, -period))
+            if late < 0:
+                late = 0
+            self.late_runs += 1
+            self.late_total += late
+            if late > self.late_max:
+                self.late_max = late
+            if late >= period:
+                self.missed += 1
+            self._bin(self.late_hist, late)
+
+        last = len(self.state_runs) - 1
+        if not 0 <= state < last:
+            state = last
+        self.state_runs[state] += 1
+        self.state_total[state] += runt
+        if runt > self.state_max[state]:
+            self.state_max[state] = runt
+        if period is not None and runt > period:
+            self.overruns += 1
+            self.state_over[state] += 1
+
+    def print_report(self):
+        """!
+        Print the figures for the task.
+        """
+        runs = self.runs or 1
+        late_runs = self.late_runs or 1
+        print(f"{self.name}: {self.runs} runs, run time avg {self.run_total // runs} us "
+              f"max {self.run_max} us, late avg {self.late_total // late_runs} us "
+              f"max {self.late_max} us, {self.overruns} overruns, {self.missed} missed")
+        print("  STATE    RUNS  TOTAL ms    AVG us    MAX us  OVERRUNS")
+        for state in range(len(self.state_runs)):
+            count = self.state_runs[state]
+            if count:
+                print(f"  {state:5d}{count:8d}{self.state_total[state] // 1000:10d}"
+                      f"{self.state_total[state] // count:10d}{self.state_max[state]:10d}"
+                      f"{self.state_over[state]:10d}")
+        for title, hist in (("run time", self.run_hist), ("late", self.late_hist)):
+            print(f"  {title} [{self.bin_us} us bins]: "
+                  + ' '.join(str(count) for count in hist))
+
+
+class SchedProfiler:
+    """!
+    Profiles a set of cotask tasks. Each task added has its generator wrapped so that
+    every run is timed and counted in the task's TaskProfile.
+    """
+
+    def __init__(self, bins=20, bin_us=1000, states=8):
+        """!
+        @param bins: number of bins in each histogram
+        @param bin_us: width of each histogram bin [us]
+        @param states: number of states to keep figures for in each task
+        """
+        self.bins = bins
+        self.bin_us = bin_us
+        self.states = states
+        ## TaskProfile for each task added, in the order they were added
+        self.profiles = []
+
+    def add(self, task):
+        """!
+        Start profiling a task; do this before the scheduler first runs it.
+        @param task: the cotask.Task to profile
+        @return the task's TaskProfile
+        """
+        prof = TaskProfile(task, self.bins, self.bin_us, self.states)
+        task._run_gen = self._timed(task._run_gen, prof)
+        self.profiles.append(prof)
+        return prof
+
+    @staticmethod
+    def _timed(gen, prof):
+        """!
+        Run a task's generator, timing each run and passing on the state it yields.
+        """
+        while True:
+            start = utime.ticks_us()
+            state = next(gen)
+            prof.record(state, start, utime.ticks_diff(utime.ticks_us(), start))
+            yield state
+
+    def reset(self):
+        """!
+        Clear the figures for every task.
+        """
+        for prof in self.profiles:
+            prof.reset()
+
+    def print_report(self):
+        """!
+        Print the figures for every task.
+        """
+        for prof in self.profiles:
+            prof.print_report()
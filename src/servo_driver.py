@@ -0,0 +1,111 @@
+"""!
+@file servo_driver.py
+    This file contains class ServoDriver, which pulls and releases the NERF gun's trigger
+    with a hobby servo driven by a hardware timer's PWM channel.
+
+@author Brendan Stratford
+@author Johnathan Waldmire
+@author Jonathan Romeo
+@date   10/18/2026
+"""
+
+import utime
+
+## Nothing going on
+IDLE = 0
+## Waiting for the delay before the trigger is pulled
+WAIT = 1
+## Holding the servo at the trigger pulled position
+PULL = 2
+## Holding the servo at the released position
+RELEASE = 3
+
+
+class ServoDriver:
+    """!
+    Drives the trigger servo with a 50 Hz PWM signal from a hardware timer, so the pulses
+    keep coming at the right width without any help from the program. A shot is a state
+    machine rather than a series of sleeps: fire() starts it, and update() is called every
+    task run to move it on once each step's time is up. The servo is held at the pulled
+    position, then at the released position, and then its pulses are switched off so it
+    stops pushing against the trigger, which is what the old "rapid on-off" pulses were
+    for. Nothing blocks, so the other tasks keep running through a shot.
+    """
+
+    def __init__(self, pin, timer, channel, pull_us=2000, release_us=500, pull_ms=320,
+                 release_ms=120):
+        """!
+        Creates a servo driver and leaves the servo switched off.
+        @param pin: Pin the servo's signal wire is on, PC7 on the Nucleo.
+        @param timer: Timer for the PWM, set to 50 Hz as hobby servos expect.
+        @param channel: Timer channel set up for PWM on the pin, such as channel 2 of timer 8.
+        @param pull_us: pulse width which pulls the trigger [us]
+        @param release_us: pulse width which lets go of the trigger [us]
+        @param pull_ms: how long the servo takes to pull the trigger all the way [ms]
+        @param release_ms: how long the servo takes to let the trigger go [ms]
+        """
+        self.pin = pin
+        self.tim = timer
+        self.ch = channel
+        self.pull_us = pull_us
+        self.release_us = release_us
+        self.pull_ms = pull_ms
+        self.release_ms = release_ms
+        self._period_us = 1000000 / timer.freq()
+        ## Step of the shot in progress: IDLE, WAIT, PULL or RELEASE
+        self.state = IDLE
+        self._until = 0
+        ## Number of shots fired
+        self.shots = 0
+        self.set_pulse_us(0)
+
+    def set_pulse_us(self, pulse_us):
+        """!
+        Set the width of the pulses sent to the servo.
+        @param pulse_us: pulse width [us], or 0 to stop sending pulses
+        """
+        self.ch.pulse_width_percent(100 * pulse_us / self._period_us)
+
+    def fire(self, delay_ms=0):
+        """!
+        Start a shot, unless one is already in progress.
+        @param delay_ms: time to wait before pulling the trigger [ms]
+        @return True if the shot was started
+        """
+        if self.state != IDLE:
+            return False
+        self.state = WAIT
+        self._until = utime.ticks_add(utime.ticks_ms(), delay_ms)
+        self.update()
+        return True
+
+    @property
+    def busy(self):
+        """!
+        True while a shot is in progress.
+        """
+        return self.state != IDLE
+
+    def update(self):
+        """!
+        Move the shot on to its next step once the current one's time is up.
+        @return True while a shot is in progress
+        """
+        if self.state == IDLE:
+            return False
+        now = utime.ticks_ms()
+        if utime.ticks_diff(now, self._until) < 0:
+            return True
+        if self.state == WAIT:
+            self.set_pulse_us(self.pull_us)           # pull trigger in
+            self._until = utime.ticks_add(now, self.pull_ms)
+            self.state = PULL
+            self.shots += 1
+        elif self.state == PULL:
+            self.set_pulse_us(self.release_us)        # release trigger
+            self._until = utime.ticks_add(now, self.release_ms)
+            self.state = RELEASE
+        else:
+            self.set_pulse_us(0)                      # stop the servo at trigger edge
+            self.state = IDLE
+        return self.state != IDLE
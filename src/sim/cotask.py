@@ -0,0 +1,195 @@
+"""!
+@file cotask.py
+    Stand-in for the ME405 cooperative multitasking module, cotask, for the simulation. It has
+    the same Task and TaskList classes and the same @c task_list, so main.py runs unchanged.
+    When no task is ready to run, the scheduler moves the virtual clock straight to the time
+    the next one is due instead of spinning, which is what makes a simulated duel fast. When
+    the simulation's end time has passed, the scheduler raises KeyboardInterrupt, just as
+    pressing ^C on the board would.
+
+@author Brendan Stratford
+@author Johnathan Waldmire
+@author Jonathan Romeo
+@date   10/18/2026
+"""
+
+import utime
+from world import world
+
+
+class Task:
+    """!
+    A task which runs a generator function, either every @c period milliseconds or when
+    another task sets its @c go_flag.
+    """
+
+    def __init__(self, run_fun, name="NoName", priority=0, period=None, profile=False,
+                 trace=False, shares=()):
+        if shares:
+            self._run_gen = run_fun(shares)
+        else:
+            self._run_gen = run_fun()
+        self.name = name
+        self.priority = int(priority)
+        if period is not None:
+            self.period = int(period * 1000)
+            self._next_run = utime.ticks_add(utime.ticks_us(), self.period)
+        else:
+            self.period = period
+            self._next_run = None
+        self._prof = profile
+        self.reset_profile()
+        self._prev_state = 0
+        self._trace = trace
+        self._tr_data = []
+        self._prev_time = utime.ticks_us()
+        self.go_flag = False
+
+    def schedule(self):
+        """!
+        Run the task once if it's ready.
+        @return True if the task ran
+        """
+        if not self.ready():
+            return False
+        self.go_flag = False
+        if self._prof:
+            stime = utime.ticks_us()
+        curr_state = next(self._run_gen)
+        if self._prof:
+            self._runs += 1
+            runt = utime.ticks_diff(utime.ticks_us(), stime)
+            if self._runs > 2:
+                self._run_sum += runt
+                if runt > self._slowest:
+                    self._slowest = runt
+        if self._trace and curr_state != self._prev_state:
+            self._tr_data.append((utime.ticks_diff(utime.ticks_us(), self._prev_time),
+                                  curr_state))
+            self._prev_state = curr_state
+        return True
+
+    def ready(self):
+        """!
+        @return True if the task's period has come around or its go_flag has been set
+        """
+        if self.period is not None:
+            late = utime.ticks_diff(utime.ticks_us(), self._next_run)
+            if late >= 0:
+                self.go_flag = True
+                self._next_run = utime.ticks_add(self._next_run, self.period)
+                if self._prof:
+                    self._late_sum += late
+                    if late > self._latest:
+                        self._latest = late
+        return self.go_flag
+
+    def due_in(self):
+        """!
+        @return microseconds until the task's next run is due, or None if it has no period
+        """
+        if self.period is None:
+            return None
+        return utime.ticks_diff(self._next_run, utime.ticks_us())
+
+    def set_period(self, new_period):
+        if new_period is None:
+            self.period = None
+        else:
+            self.period = int(new_period) * 1000
+
+    def reset_profile(self):
+        self._runs = 0
+        self._run_sum = 0
+        self._slowest = 0
+        self._late_sum = 0
+        self._latest = 0
+
+    def get_trace(self):
+        return '\n'.join(f'{t}: {s}' for t, s in self._tr_data)
+
+    def go(self):
+        self.go_flag = True
+
+    def __repr__(self):
+        rst = f"{self.name:<16s}{self.priority: 4d}"
+        try:
+            rst += f"{(self.period / 1000.0): 10.1f}"
+        except TypeError:
+            rst += '         -'
+        rst += f"{self._runs: 8d}"
+        if self._prof and self._runs > 0:
+            avg_dur = (self._run_sum / self._runs) / 1000.0
+            avg_late = (self._late_sum / self._runs) / 1000.0
+            rst += f"{avg_dur: 10.3f}{(self._slowest / 1000.0): 10.3f}"
+            if self.period is not None:
+                rst += f"{avg_late: 10.3f}{(self._latest / 1000.0): 10.3f}"
+        return rst
+
+
+class TaskList:
+    """!
+    The list of tasks to be run, sorted by priority.
+    """
+
+    def __init__(self):
+        ## Lists of [priority, index of next task to try, task, task, ...]
+        self.pri_list = []
+
+    def append(self, task):
+        for pri in self.pri_list:
+            if pri[0] == task.priority:
+                pri.append(task)
+                break
+        else:
+            self.pri_list.append([task.priority, 2, task])
+            self.pri_list.sort(key=lambda pri: pri[0], reverse=True)
+
+    def rr_sched(self):
+        """!
+        Run the next ready task in round-robin order, ignoring priorities.
+        """
+        for pri in self.pri_list:
+            for task in pri[2:]:
+                task.schedule()
+        self._idle()
+
+    def pri_sched(self):
+        """!
+        Run the highest priority task which is ready. Within a priority, tasks take turns.
+        """
+        for pri in self.pri_list:
+            tries = 2
+            length = len(pri)
+            while tries < length:
+                ran = pri[pri[1]].schedule()
+                tries += 1
+                pri[1] += 1
+                if pri[1] >= length:
+                    pri[1] = 2
+                if ran:
+                    return
+        self._idle()
+
+    def _idle(self):
+        # Nothing was ready; skip the clock ahead to the next task which is due
+        if world.end_us is not None and world.now_us >= world.end_us:
+            raise KeyboardInterrupt
+        wait = None
+        for pri in self.pri_list:
+            for task in pri[2:]:
+                due = task.due_in()
+                if due is not None and (wait is None or due < wait):
+                    wait = due
+        world.advance(max(1, wait if wait is not None else 1000))
+
+    def __repr__(self):
+        ret_str = 'TASK             PRI    PERIOD    RUNS   AVG DUR   MAX DUR  AVG LATE  MAX LATE\n'
+        for pri in self.pri_list:
+            for task in pri[2:]:
+                ret_str += str(task) + '\n'
+        return ret_str
+
+
+## The list of tasks which main.py adds its tasks to
+task_list = TaskList()
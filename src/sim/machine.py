@@ -0,0 +1,50 @@
+"""!
+@file machine.py
+    Stand-in for MicroPython's machine module: just the I2C bus, which reaches the simulated
+    thermal camera, and a Pin class for the I2C pin arguments.
+
+@author Brendan Stratford
+@author Johnathan Waldmire
+@author Jonathan Romeo
+@date   10/18/2026
+"""
+
+from world import world
+
+
+class Pin:
+    def __init__(self, name, *args, **kwargs):
+        self.name = name
+
+
+class I2C:
+    """!
+    An I2C bus connected to the simulation's devices. Each transfer uses up the time it
+    would take on a real bus, so time spent reading the camera shows up in the timing.
+    """
+
+    def __init__(self, bus, scl=None, sda=None, freq=400000):
+        self.bus = bus
+
+    def scan(self):
+        return sorted(world.i2c_devices)
+
+    def _device(self, addr):
+        try:
+            return world.i2c_devices[addr]
+        except KeyError:
+            raise OSError(19) from None   # ENODEV, as the board reports it
+
+    def readfrom_mem_into(self, addr, memaddr, buf, addrsize=8):
+        data = self._device(addr).read(memaddr, len(buf))
+        world.i2c_time(len(buf) + 2 + addrsize // 8)
+        buf[:] = data
+
+    def readfrom_mem(self, addr, memaddr, nbytes, addrsize=8):
+        buf = bytearray(nbytes)
+        self.readfrom_mem_into(addr, memaddr, buf, addrsize=addrsize)
+        return bytes(buf)
+
+    def writeto_mem(self, addr, memaddr, buf, addrsize=8):
+        self._device(addr).write(memaddr, buf)
+        world.i2c_time(len(buf) + 1 + addrsize // 8)
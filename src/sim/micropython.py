@@ -0,0 +1,30 @@
+"""!
+@file micropython.py
+    Stand-in for MicroPython's micropython module. The code emitter decorators do nothing,
+    and scheduled functions run straight away.
+
+@author Brendan Stratford
+@author Johnathan Waldmire
+@author Jonathan Romeo
+@date   10/18/2026
+"""
+
+
+def const(value):
+    return value
+
+
+def native(func):
+    return func
+
+
+def viper(func):
+    return func
+
+
+def alloc_emergency_exception_buf(size):
+    pass
+
+
+def schedule(func, arg):
+    func(arg)
@@ -0,0 +1,65 @@
+"""!
+@file mlx90640/__init__.py
+    Stand-in for mwerezak's MLX90640 driver for the simulation. It has the parts MLX_Cam
+    uses: setting the pattern and refresh rate, checking for new data and reading the raw
+    image, all through the simulated I2C bus.
+
+@author Brendan Stratford
+@author Johnathan Waldmire
+@author Jonathan Romeo
+@date   10/18/2026
+"""
+
+from array import array
+from mlx90640.calibration import IMAGE_SIZE
+from mlx90640.image import ChessPattern, InterleavedPattern
+
+_RATES = (0.5, 1, 2, 4, 8, 16, 32, 64)
+
+
+class MLX90640:
+
+    def __init__(self, i2c, addr=0x33):
+        self._i2c = i2c
+        self._addr = addr
+        self._pattern = ChessPattern
+        self._buf = bytearray(2 * IMAGE_SIZE)
+        self._word = bytearray(2)
+        self.raw = array('h', [0] * IMAGE_SIZE)
+
+    def _read_reg(self, reg):
+        self._i2c.readfrom_mem_into(self._addr, reg, self._word, addrsize=16)
+        return (self._word[0] << 8) | self._word[1]
+
+    def _write_reg(self, reg, value):
+        self._word[0] = value >> 8
+        self._word[1] = value & 0xFF
+        self._i2c.writeto_mem(self._addr, reg, self._word, addrsize=16)
+
+    def set_pattern(self, pattern):
+        self._pattern = pattern
+
+    def setup(self):
+        pass
+
+    @property
+    def refresh_rate(self):
+        return _RATES[(self._read_reg(0x800D) >> 7) & 0x07]
+
+    @refresh_rate.setter
+    def refresh_rate(self, rate):
+        # Use the nearest rate the camera has, e.g. 8 Hz when asked for 10
+        code = min(range(len(_RATES)), key=lambda k: abs(_RATES[k] - rate))
+        self._write_reg(0x800D, (self._read_reg(0x800D) & ~0x0380) | (code << 7))
+
+    @property
+    def has_data(self):
+        return bool(self._read_reg(0x8000) & 0x0008)
+
+    def read_image(self, sm_num):
+        self._i2c.readfrom_mem_into(self._addr, 0x0400, self._buf, addrsize=16)
+        for k in range(IMAGE_SIZE):
+            word = (self._buf[2 * k] << 8) | self._buf[2 * k + 1]
+            self.raw[k] = word - 0x10000 if word & 0x8000 else word
+        self._write_reg(0x8000, self._read_reg(0x8000) & ~0x0008)
+        return self.raw
@@ -0,0 +1,9 @@
+"""!
+@file mlx90640/calibration.py
+    Image size constants from mwerezak's MLX90640 driver, for the simulation.
+"""
+
+NUM_ROWS = 24
+NUM_COLS = 32
+IMAGE_SIZE = NUM_ROWS * NUM_COLS
+TEMP_K = 273.15
@@ -0,0 +1,12 @@
+"""!
+@file mlx90640/image.py
+    The subpage patterns from mwerezak's MLX90640 driver, for the simulation.
+"""
+
+
+class ChessPattern:
+    pass
+
+
+class InterleavedPattern:
+    pass
@@ -0,0 +1,256 @@
+"""!
+@file pyb.py
+    Stand-in for MicroPython's pyb module for the simulation. Timers set up for PWM drive the
+    simulated panning motor, a timer set up as an encoder counter reads it, output pins keep
+    a log of their changes (which is how a trigger pull is seen), timer callbacks run on
+    the virtual clock and what's written to the USB serial port and UARTs is kept.
+
+@author Brendan Stratford
+@author Johnathan Waldmire
+@author Jonathan Romeo
+@date   10/18/2026
+"""
+
+from world import world
+
+
+def info(*args):
+    print("Simulated Nucleo")
+
+
+def millis():
+    return world.now_us // 1000
+
+
+def micros():
+    return world.now_us
+
+
+def delay(ms):
+    world.advance(ms * 1000)
+
+
+def udelay(us):
+    world.advance(us)
+
+
+def disable_irq():
+    return True
+
+
+def enable_irq(state=True):
+    pass
+
+
+class _Board:
+    """!
+    Pin names such as @c Pin.board.PA10, which here are just the names as strings.
+    """
+
+    def __getattr__(self, name):
+        return name
+
+
+class Pin:
+    IN = 0
+    OUT_PP = 1
+    OUT_OD = 2
+    AF_PP = 3
+    AF_OD = 4
+    ANALOG = 5
+    PULL_NONE = 0
+    PULL_UP = 1
+    PULL_DOWN = 2
+    AF1_TIM1 = 1
+    AF1_TIM2 = 1
+    AF2_TIM3 = 2
+    AF2_TIM4 = 2
+    AF2_TIM5 = 2
+    AF3_TIM8 = 3
+    board = _Board()
+
+    def __init__(self, name, mode=IN, pull=PULL_NONE, af=-1, value=None):
+        self._name = name
+        self._mode = mode
+        self._value = 0
+        world.pins[name] = self
+        if value is not None:
+            self.value(value)
+
+    def name(self):
+        return self._name
+
+    def value(self, value=None):
+        if value is None:
+            return self._value
+        value = 1 if value else 0
+        if value != self._value:
+            self._value = value
+            world.pin_changed(self._name, value)
+
+    def high(self):
+        self.value(1)
+
+    def low(self):
+        self.value(0)
+
+    def __call__(self, value=None):
+        return self.value(value)
+
+
+class TimerChannel:
+    """!
+    One channel of a timer. In PWM mode it remembers its pulse width, which the simulation
+    reads to find the duty cycles applied to the motors; the pulse widths given to a
+    channel driving a pin are also logged, which is how a servo's trigger pull is seen.
+    """
+
+    def __init__(self, timer, channel, mode, pin=None, pulse_width_percent=0):
+        self._timer = timer
+        self._channel = channel
+        self._mode = mode
+        self._pin = pin
+        self._percent = 0.0
+        self.pulse_width_percent(pulse_width_percent)
+
+    def pulse_width_percent(self, value=None):
+        if value is None:
+            return self._percent
+        self._set(max(0.0, min(100.0, float(value))))
+
+    def pulse_width(self, value=None):
+        if value is None:
+            return int(self._percent * (self._timer._period + 1) / 100)
+        self._set(max(0.0, min(100.0, 100.0 * value / (self._timer._period + 1))))
+
+    def _set(self, percent):
+        if percent != self._percent and self._pin is not None and self._mode == Timer.PWM:
+            world.pwm_changed(self._pin.name(), percent * 1e4 / self._timer.freq())
+        self._percent = percent
+
+    def callback(self, fun):
+        pass
+
+
+class Timer:
+    """!
+    A hardware timer. The timer numbered by @c world.encoder_timer counts encoder pulses
+    from the simulated motor; a timer with a callback calls it at the timer's frequency.
+    """
+    PWM = 0
+    PWM_INVERTED = 1
+    OC_TIMING = 2
+    IC = 3
+    ENC_A = 4
+    ENC_B = 5
+    ENC_AB = 6
+    UP = 0
+    DOWN = 1
+    CENTER = 2
+
+    ## Clock driving the timers [Hz]
+    SOURCE_FREQ = 84000000
+
+    def __init__(self, num, freq=None, prescaler=0, period=0xFFFF, callback=None, **kwargs):
+        self._num = num
+        self._channels = {}
+        self.cb = None
+        self.next_us = 0
+        if freq is not None:
+            self._prescaler = 0
+            self._period = max(1, int(Timer.SOURCE_FREQ / freq)) - 1
+        else:
+            self._prescaler = prescaler
+            self._period = period
+        world.timers[num] = self
+        self.callback(callback)
+
+    def init(self, freq=None, prescaler=0, period=0xFFFF, callback=None, **kwargs):
+        self.__init__(self._num, freq, prescaler, period, callback)
+
+    def deinit(self):
+        self.cb = None
+        world.timers.pop(self._num, None)
+
+    def freq(self):
+        return Timer.SOURCE_FREQ / ((self._prescaler + 1) * (self._period + 1))
+
+    def period(self, value=None):
+        if value is None:
+            return self._period
+        self._period = value
+
+    def prescaler(self, value=None):
+        if value is None:
+            return self._prescaler
+        self._prescaler = value
+
+    def channel(self, channel, mode=None, pin=None, **kwargs):
+        if mode is None:
+            return self._channels.get(channel)
+        ch = TimerChannel(self, channel, mode, pin, **kwargs)
+        self._channels[channel] = ch
+        return ch
+
+    def percent(self, channel):
+        """!
+        @return the PWM duty cycle of a channel, or 0 if it hasn't been set up [%]
+        """
+        ch = self._channels.get(channel)
+        return 0.0 if ch is None else ch._percent
+
+    def counter(self, value=None):
+        if self._num == world.encoder_timer:
+            return world.plant.counts() & self._period
+        return (world.now_us * 84 // (self._prescaler + 1)) % (self._period + 1)
+
+    def callback(self, fun):
+        self.cb = fun
+        if fun is not None:
+            self.next_us = world.now_us + self._interval_us()
+
+    def _interval_us(self):
+        return max(1, int(round(1e6 / self.freq())))
+
+    def fire(self):
+        """!
+        Run the callback, as the timer's interrupt would.
+        """
+        self.next_us += self._interval_us()
+        self.cb(self)
+
+
+class UART:
+    def __init__(self, bus, baudrate=9600, **kwargs):
+        self.bus = bus
+        self.baudrate = baudrate
+
+    def any(self):
+        return 0
+
+    def write(self, buf):
+        # Kept for run_sim.py to hand back, rather than mixed in with printed text
+        world.uart_out += buf
+        return len(buf)
+
+    def read(self, nbytes=None):
+        return None
+
+
+class USB_VCP:
+    def __init__(self, id=0):
+        pass
+
+    def isconnected(self):
+        return True
+
+    def any(self):
+        return False
+
+    def write(self, buf):
+        # Kept for run_sim.py to hand back, rather than mixed in with printed text
+        world.usb_out += buf
+        return len(buf)
+
+    def read(self, nbytes=None):
+        return None
@@ -0,0 +1,161 @@
+"""!
+@file run_sim.py
+    Runs the turret program, main.py, on a PC against simulated hardware. The stand-in
+    modules in this directory take the place of pyb, machine, utime, the MLX90640 driver and
+    the ME405 cotask and task_share modules, and main.py and the modules it uses are run
+    unchanged. A duel takes a small fraction of a second of real time, so the control loop
+    and aiming code can be tried thousands of times over with different targets, backlash
+    and camera frames.
+
+    From the @c src directory:
+    @code
+    python sim/run_sim.py --target 190 --backlash 3 --seconds 12
+    python sim/run_sim.py --frames frames.mlx        # serve frames logged on the board
+    python sim/run_sim.py --telemetry run.bin        # then: python telemetry.py run.bin
+    @endcode
+
+    From another program, put this directory and @c src on the path and call run().
+    None of this directory is copied to the board.
+
+@author Brendan Stratford
+@author Johnathan Waldmire
+@author Jonathan Romeo
+@date   10/18/2026
+"""
+
+import io
+import math
+import os
+import sys
+import runpy
+import tempfile
+import contextlib
+
+## This directory, which has to come before anything else on the path
+SIM_DIR = os.path.dirname(os.path.abspath(__file__))
+## The directory holding main.py and the rest of the board's code
+SRC_DIR = os.path.dirname(SIM_DIR)
+
+for _path in (SRC_DIR, SIM_DIR):
+    if _path in sys.path:
+        sys.path.remove(_path)
+    sys.path.insert(0, _path)
+
+import time
+import world
+import cotask
+import task_share
+
+
+def run(seconds=15.0, main=None, quiet=False, workdir=None, **config):
+    """!
+    Run the turret program against freshly reset simulated hardware.
+    @param seconds: simulated time after which the program is stopped [s]
+    @param main: path of the program to run, main.py by default
+    @param quiet: True to throw away what the program prints
+    @param workdir: directory to run in, where files such as frame logs are written;
+           a new temporary directory by default
+    @param config: settings for world.World.reset(), such as target=math.radians(190)
+           for the camera or plant=world.MotorPlant(backlash=math.radians(3))
+    @return dictionary of results: 'sim_s' and 'wall_s', the simulated and real time taken;
+            'shots', the times of trigger pulls [s]; 'turret_deg' and 'target_deg', the
+            turret and target angles at the first shot (or the end if there wasn't one);
+            'error_deg', the difference; 'errors_deg', the aim error at every shot;
+            'usb', the bytes written to the USB serial port; 'uart', the bytes written to
+            UARTs, such as telemetry; and 'workdir'
+    """
+    sim = world.world
+    sim.reset(end_s=seconds, **config)
+    cotask.task_list = cotask.TaskList()
+    del task_share.share_list[:]
+
+    if workdir is None:
+        workdir = tempfile.mkdtemp(prefix='turret_sim_')
+    here = os.getcwd()
+    out = io.StringIO() if quiet else sys.stdout
+    start = time.perf_counter()
+    os.chdir(workdir)
+    try:
+        with contextlib.redirect_stdout(out):
+            runpy.run_path(main or os.path.join(SRC_DIR, 'main.py'), run_name='__main__')
+    finally:
+        os.chdir(here)
+    wall = time.perf_counter() - start
+
+    # A trigger pull is a servo pulse on PC7 at least 1.5 ms long; release pulses are shorter.
+    # The pulses are either made by switching the pin or set up on a PWM channel
+    pulls = []
+    rise = None
+    for t_us, name, value, angle in sim.pin_log:
+        if name != 'PC7':
+            continue
+        if value:
+            rise = (t_us, angle)
+        elif rise is not None:
+            if t_us - rise[0] >= 1500:
+                pulls.append(rise)
+            rise = None
+    pulling = False
+    for t_us, name, pulse_us, angle in sim.pwm_log:
+        if name == 'PC7':
+            if pulse_us >= 1500 and not pulling:
+                pulls.append((t_us, angle))
+            pulling = pulse_us >= 1500
+    pulls.sort()
+    shots = [t_us / 1e6 for t_us, angle in pulls]
+    errors = [_error(sim.camera.angle(t_us), angle) for t_us, angle in pulls]
+    if pulls:
+        turret = pulls[0][1]
+        target = sim.camera.angle(pulls[0][0])
+    else:
+        turret = sim.plant.turret
+        target = sim.camera.angle()
+    return {'sim_s': sim.now_us / 1e6, 'wall_s': wall, 'shots': shots,
+            'turret_deg': math.degrees(turret), 'target_deg': math.degrees(target),
+            'error_deg': _error(target, turret), 'errors_deg': errors,
+            'usb': bytes(sim.usb_out), 'uart': bytes(sim.uart_out), 'workdir': workdir}
+
+
+def _error(target, turret):
+    """!
+    @return the angle from the turret to the target, between -180 and 180 [deg]
+    """
+    return math.degrees(math.atan2(math.sin(target - turret), math.cos(target - turret)))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run main.py on simulated hardware")
+    parser.add_argument('--seconds', type=float, default=15.0, help="simulated run time [s]")
+    parser.add_argument('--target', type=float, default=185.0,
+                        help="target angle from the turret's starting angle [deg]")
+    parser.add_argument('--backlash', type=float, default=2.0, help="gear backlash [deg]")
+    parser.add_argument('--drift', type=float, default=0.0,
+                        help="speed at which the target moves [deg/s]")
+    parser.add_argument('--frames', help="frame log to serve instead of rendered images")
+    parser.add_argument('--telemetry', help="file to save the last run's telemetry in")
+    parser.add_argument('--runs', type=int, default=1,
+                        help="number of runs, with the target moved a little each time")
+    parser.add_argument('--quiet', action='store_true', help="hide what main.py prints")
+    args = parser.parse_args()
+
+    frames = None
+    if args.frames:
+        import frame_log
+        frames = frame_log.FrameReplay(args.frames)
+
+    for n in range(args.runs):
+        target = args.target + (n - (args.runs - 1) / 2) * 0.5
+        result = run(args.seconds, quiet=args.quiet or args.runs > 1,
+                     plant=world.MotorPlant(backlash=math.radians(args.backlash)),
+                     target=math.radians(target), frames=frames, seed=n + 1,
+                     drift=math.radians(args.drift))
+        shot = f"{result['shots'][0]:.2f} s" if result['shots'] else 'none'
+        print(f"target {result['target_deg']:7.2f} deg  turret {result['turret_deg']:7.2f} deg"
+              f"  error {result['error_deg']:6.2f} deg  first shot {shot}"
+              f"{'  shots ' + str(len(result['shots'])) if len(result['shots']) > 1 else ''}"
+              f"  ({result['sim_s']:.1f} s simulated in {result['wall_s']:.2f} s)")
+    if args.telemetry:
+        with open(args.telemetry, 'wb') as file:
+            file.write(result['uart'])
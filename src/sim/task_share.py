@@ -0,0 +1,103 @@
+"""!
+@file task_share.py
+    Stand-in for the ME405 task_share module for the simulation: Share holds one value and
+    Queue holds a first-in, first-out buffer of them. Values are kept in arrays of the given
+    type code, so a value which wouldn't fit on the board doesn't fit here either.
+
+@author Brendan Stratford
+@author Johnathan Waldmire
+@author Jonathan Romeo
+@date   10/18/2026
+"""
+
+from array import array
+
+## All the shares and queues which have been made, for show_all()
+share_list = []
+
+
+class BaseShare:
+    def __init__(self, type_code, thread_protect=True, name=None):
+        self._type_code = type_code
+        self._thread_protect = thread_protect
+        self._name = name
+        share_list.append(self)
+
+
+class Share(BaseShare):
+    """!
+    A single value passed from one task to another.
+    """
+
+    def __init__(self, type_code, thread_protect=True, name=None):
+        super().__init__(type_code, thread_protect, name)
+        self._buffer = array(type_code, [0])
+
+    def put(self, data, in_ISR=False):
+        self._buffer[0] = data
+
+    def get(self, in_ISR=False):
+        return self._buffer[0]
+
+    def __repr__(self):
+        return f"Share {self._name}: {self._buffer[0]}"
+
+
+class Queue(BaseShare):
+    """!
+    A first-in, first-out queue of values passed from one task to another.
+    """
+
+    def __init__(self, type_code, size, thread_protect=False, overwrite=False, name=None):
+        super().__init__(type_code, thread_protect, name)
+        self._size = size
+        self._overwrite = overwrite
+        self._buffer = array(type_code, [0] * size)
+        self.clear()
+
+    def put(self, item, in_ISR=False):
+        if self.full():
+            if in_ISR:
+                return
+            if not self._overwrite:
+                raise RuntimeError(f"Queue {self._name} is full and would block forever")
+            self._rd_idx = (self._rd_idx + 1) % self._size
+            self._num_items -= 1
+        self._buffer[self._wr_idx] = item
+        self._wr_idx = (self._wr_idx + 1) % self._size
+        self._num_items += 1
+        if self._num_items > self._max_full:
+            self._max_full = self._num_items
+
+    def get(self, in_ISR=False):
+        if not self._num_items:
+            raise RuntimeError(f"Queue {self._name} is empty and would block forever")
+        item = self._buffer[self._rd_idx]
+        self._rd_idx = (self._rd_idx + 1) % self._size
+        self._num_items -= 1
+        return item
+
+    def any(self):
+        return self._num_items > 0
+
+    def empty(self):
+        return self._num_items == 0
+
+    def full(self):
+        return self._num_items >= self._size
+
+    def num_in(self):
+        return self._num_items
+
+    def clear(self):
+        self._rd_idx = 0
+        self._wr_idx = 0
+        self._num_items = 0
+        self._max_full = 0
+
+    def __repr__(self):
+        return f"Queue<{self._type_code}> {self._name}: {self._num_items}/{self._size}"
+
+
+def show_all():
+    return '\n'.join(str(share) for share in share_list)
@@ -0,0 +1,54 @@
+"""!
+@file utime.py
+    Stand-in for MicroPython's utime module which runs on the simulation's virtual clock.
+    Tick counts wrap around the way they do on the board, so code which forgets to use
+    ticks_diff() and ticks_add() breaks here as it would there.
+
+@author Brendan Stratford
+@author Johnathan Waldmire
+@author Jonathan Romeo
+@date   10/18/2026
+"""
+
+from world import world
+
+## Tick counts wrap around to zero at this value, as on the board
+TICKS_PERIOD = 1 << 30
+_TICKS_MAX = TICKS_PERIOD - 1
+_TICKS_HALF = TICKS_PERIOD // 2
+
+
+def ticks_us():
+    return world.now_us & _TICKS_MAX
+
+
+def ticks_ms():
+    return (world.now_us // 1000) & _TICKS_MAX
+
+
+def ticks_cpu():
+    return ticks_us()
+
+
+def ticks_diff(ticks1, ticks2):
+    return ((ticks1 - ticks2 + _TICKS_HALF) & _TICKS_MAX) - _TICKS_HALF
+
+
+def ticks_add(ticks, delta):
+    return (ticks + delta) & _TICKS_MAX
+
+
+def time():
+    return world.now_us // 1000000
+
+
+def sleep(seconds):
+    world.advance(seconds * 1000000)
+
+
+def sleep_ms(ms):
+    world.advance(ms * 1000)
+
+
+def sleep_us(us):
+    world.advance(us)
@@ -0,0 +1,362 @@
+"""!
+@file world.py
+    This file contains class World, which holds the state shared by the hardware stand-ins
+    used to run the turret code on a PC: a virtual clock, the timers and pins which have been
+    set up, a model of the panning motor and geartrain, and a model of the thermal camera.
+
+    Time in the simulation only moves when the code waits for it, by sleeping, by having no
+    task ready to run, or by spending time on the I2C bus, so a duel runs much faster than
+    real time. As the clock moves, the motor model is stepped, the camera measures subpages
+    and timer callbacks are run, all in time order.
+
+@author Brendan Stratford
+@author Johnathan Waldmire
+@author Jonathan Romeo
+@date   10/18/2026
+"""
+
+import math
+import random
+from array import array
+
+## Longest time step used to integrate the motor model [us]
+STEP_US = 1000
+
+## Number of noise samples drawn in advance for the camera images
+NOISE_POOL = 4096
+
+## Camera refresh rates [Hz] selected by bits 7 to 9 of its control register
+REFRESH_RATES = (0.5, 1, 2, 4, 8, 16, 32, 64)
+
+
+class MotorPlant:
+    """!
+    Model of the panning axis: a DC gearmotor with its encoder, followed by gears with
+    backlash which turn the turret. The motor speed follows the applied duty cycle through a
+    first order lag, and duty cycles too small to overcome friction don't move it. The encoder
+    is on the motor side of the backlash, so the turret can be off by up to half the backlash
+    from where the encoder says it is.
+    """
+
+    def __init__(self, counts_per_rad=730 / math.pi, max_speed=200 * 2 * math.pi / 60, tau=0.05,
+                 stiction=8.0, backlash=math.radians(2.0)):
+        """!
+        @param counts_per_rad: encoder counts per radian of the gearbox output
+        @param max_speed: gearbox output speed at 100% duty cycle [rad/s]; the default is
+               the 200 rpm no-load speed of a 12 V, 50:1 Pololu 37D gearmotor
+        @param tau: time constant of the motor's speed response [s]
+        @param stiction: duty cycle needed before the motor moves at all [%]
+        @param backlash: total free play between the gearbox and turret [rad]
+        """
+        self.counts_per_rad = counts_per_rad
+        self.max_speed = max_speed
+        self.tau = tau
+        self.stiction = stiction
+        self.backlash = backlash
+        ## Angle of the gearbox output, where the encoder is [rad]
+        self.gear = 0.0
+        ## Speed of the gearbox output [rad/s]
+        self.speed = 0.0
+        ## Angle of the turret [rad]
+        self.turret = 0.0
+
+    def step(self, duty, dt):
+        """!
+        Move the model forward in time. The speed response is solved exactly for a
+        constant duty cycle, so steps of a millisecond or so are accurate.
+        @param duty: signed duty cycle applied to the motor [%]
+        @param dt: time step [s]
+        """
+        size = abs(duty)
+        if size <= self.stiction:
+            if self.speed == 0.0:
+                return
+            target = 0.0
+        else:
+            target = math.copysign(self.max_speed * (min(size, 100.0) - self.stiction)
+                                   / (100.0 - self.stiction), duty)
+        decay = math.exp(-dt / self.tau)
+        change = self.speed - target
+        self.gear += target * dt + change * self.tau * (1.0 - decay)
+        self.speed = target + change * decay
+        if target == 0.0 and abs(self.speed) < 1e-4:
+            self.speed = 0.0
+
+        # The turret only moves once the gears have taken up the free play
+        half = self.backlash / 2
+        if self.gear - self.turret > half:
+            self.turret = self.gear - half
+        elif self.turret - self.gear > half:
+            self.turret = self.gear + half
+
+    def counts(self):
+        """!
+        @return the encoder position of the gearbox output [counts]
+        """
+        return int(round(self.gear * self.counts_per_rad))
+
+
+class CameraDevice:
+    """!
+    Model of an MLX90640 as seen over I2C: its RAM, status register and control register.
+    Every refresh period it measures one subpage, writing the pixels of that subpage in the
+    chess pattern into RAM and flagging new data in the status register. Images are either
+    rendered from a warm target, at a fixed angle or one which drifts, as seen from the turret's current angle, or
+    taken in turn from a recorded frame log.
+    """
+
+    def __init__(self, world, target=math.radians(185.0), fov=math.radians(55.0),
+                 boresight=14.5, noise=20, frames=None, seed=1, drift=0.0):
+        """!
+        @param world: the World the camera is part of
+        @param target: angle of the target from the turret's starting angle [rad]
+        @param fov: horizontal field of view of the camera [rad]
+        @param boresight: (mirrored) column which looks straight along the barrel
+        @param noise: standard deviation of the pixel noise [raw counts]
+        @param frames: a frame_log.FrameReplay to serve instead of rendered images
+        @param seed: seed for the pixel noise
+        @param drift: how fast the target moves [rad/s]
+        """
+        self.world = world
+        self.target = target
+        self.fov = fov
+        self.boresight = boresight
+        self.noise = noise
+        self.frames = frames
+        self.drift = drift
+        self.width = 32
+        self.height = 24
+        self.ram = array('h', [0] * 832)
+        self.status = 0x0000
+        self.control = 0x1901
+        self.subpage = 0
+        self.measured = 0
+        self.next_us = world.now_us + self.period_us()
+        self._rand = random.Random(seed)
+        self._noise = [self._rand.gauss(0.0, noise) for k in range(NOISE_POOL)]
+        self._image = array('h', [0] * (self.width * self.height))
+
+    def period_us(self):
+        """!
+        @return the time taken to measure one subpage [us]
+        """
+        return int(1e6 / REFRESH_RATES[(self.control >> 7) & 0x07])
+
+    def angle(self, t_us=None):
+        """!
+        @param t_us: simulated time [us], or None for now
+        @return angle of the target from the turret's starting angle at that time [rad]
+        """
+        if t_us is None:
+            t_us = self.world.now_us
+        return self.target + self.drift * t_us * 1e-6
+
+    def render(self):
+        """!
+        Make an image of the scene from the turret's current angle: a warm target several
+        columns wide in the middle rows, ceiling lights in the top rows and a warm table
+        in the bottom rows, plus noise.
+        """
+        image = self._image
+        width = self.width
+        offset = (self.angle() - self.world.plant.turret) * width / self.fov
+        centre = self.boresight + offset
+
+        # Columns are mirrored, as they are in MLX_Cam's processing
+        target = [400.0 * math.exp(-0.5 * ((width - col - 1 - centre) / 1.2) ** 2)
+                  for col in range(width)]
+        lights = [450.0 if (width - col - 1) % 9 == 4 else 0.0 for col in range(width)]
+        noise = self._noise
+        k = self._rand.randrange(NOISE_POOL)
+        for row in range(self.height):
+            if 4 <= row < 20:
+                scene = target
+            elif row < 2:
+                scene = lights
+            else:
+                scene = None
+            base = row * width
+            for col in range(width):
+                pix = noise[k] + (150.0 if row >= 22 else 0.0)
+                if scene is not None:
+                    pix += scene[col]
+                image[base + col] = int(pix)
+                k = (k + 1) % NOISE_POOL
+        return image
+
+    def measure(self):
+        """!
+        Measure one subpage, putting its pixels in RAM and flagging the new data.
+        """
+        if self.frames is not None and len(self.frames):
+            image = self.frames.frame((self.measured // 2) % len(self.frames))
+        else:
+            image = self.render()
+        subpage = self.subpage
+        ram = self.ram
+        for row in range(self.height):
+            base = row * self.width
+            for col in range((row + subpage) & 1, self.width, 2):
+                ram[base + col] = image[base + col]
+        self.status = (self.status & ~0x000F) | 0x0008 | subpage
+        self.subpage ^= 1
+        self.measured += 1
+
+    def read(self, mem, nbytes):
+        """!
+        Read 16-bit words, big-endian, starting at a register or RAM address.
+        @param mem: address of the first word
+        @param nbytes: number of bytes to read
+        @return the bytes read
+        """
+        out = bytearray(nbytes)
+        for k in range(nbytes // 2):
+            addr = mem + k
+            if addr == 0x8000:
+                word = self.status
+            elif addr == 0x800D:
+                word = self.control
+            elif 0x0400 <= addr < 0x0400 + len(self.ram):
+                word = self.ram[addr - 0x0400] & 0xFFFF
+            else:
+                word = 0
+            out[2 * k] = word >> 8
+            out[2 * k + 1] = word & 0xFF
+        return out
+
+    def write(self, mem, data):
+        """!
+        Write 16-bit words, big-endian, to registers.
+        @param mem: address of the first word
+        @param data: the bytes to write
+        """
+        for k in range(len(data) // 2):
+            word = (data[2 * k] << 8) | data[2 * k + 1]
+            if mem + k == 0x8000:
+                self.status = word
+            elif mem + k == 0x800D:
+                self.control = word
+                self.next_us = self.world.now_us + self.period_us()
+
+
+class World:
+    """!
+    The simulated hardware and the virtual clock which drives it. There is one World,
+    @c world in this module, which the stand-in modules all use.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self, end_s=None, i2c_freq=400000, plant=None, **camera):
+        """!
+        Start a new simulation at time zero with fresh hardware.
+        @param end_s: simulated time at which the scheduler stops the program [s],
+               or None to run forever
+        @param i2c_freq: I2C bus clock, which sets how long transfers take [Hz]
+        @param plant: a MotorPlant, or None for one with the default parameters
+        @param camera: keyword arguments for the CameraDevice
+        """
+        ## Simulated time since the start [us]
+        self.now_us = 0
+        ## Simulated time at which the program is stopped [us], or None
+        self.end_us = None if end_s is None else int(end_s * 1e6)
+        self.i2c_freq = i2c_freq
+        ## Timers which have been set up, by timer number
+        self.timers = {}
+        ## Pins which have been set up, by name
+        self.pins = {}
+        ## Every change of an output pin, as (time [us], pin name, value, turret angle [rad])
+        self.pin_log = []
+        ## Every change of a PWM pulse width on a pin, as (time [us], pin name,
+        #  pulse width [us], turret angle [rad])
+        self.pwm_log = []
+        ## Everything written to the USB serial port as bytes
+        self.usb_out = bytearray()
+        ## Everything written to any UART as bytes, such as telemetry
+        self.uart_out = bytearray()
+        ## Timer number and channel numbers driving the panning motor, and the encoder timer
+        self.motor_timer = 3
+        self.motor_pos = 2
+        self.motor_neg = 1
+        self.encoder_timer = 4
+        self.plant = MotorPlant() if plant is None else plant
+        self.camera = CameraDevice(self, **camera)
+        ## Devices on the I2C bus, by address
+        self.i2c_devices = {0x33: self.camera}
+        self._advancing = False
+
+    def duty(self):
+        """!
+        @return the signed duty cycle the motor driver is applying to the panning motor [%]
+        """
+        timer = self.timers.get(self.motor_timer)
+        if timer is None:
+            return 0.0
+        return timer.percent(self.motor_pos) - timer.percent(self.motor_neg)
+
+    def advance(self, us):
+        """!
+        Let simulated time pass.
+        @param us: how long to wait [us]
+        """
+        self.advance_to(self.now_us + int(us))
+
+    def advance_to(self, t_us):
+        """!
+        Let simulated time pass until a given time, running everything that happens
+        on the way in time order.
+        @param t_us: time to move the clock to [us]
+        """
+        if self._advancing:
+            raise RuntimeError("can't wait for time to pass inside a timer callback")
+        self._advancing = True
+        try:
+            while True:
+                event, when = self._next_event(t_us)
+                self._step_plant(when)
+                if event is None:
+                    break
+                event()
+        finally:
+            self._advancing = False
+
+    def _next_event(self, t_us):
+        event = None
+        when = t_us
+        if self.camera.next_us <= when:
+            event = self._camera_event
+            when = self.camera.next_us
+        for timer in self.timers.values():
+            if timer.cb is not None and timer.next_us <= when:
+                event = timer.fire
+                when = timer.next_us
+        return event, when
+
+    def _camera_event(self):
+        self.camera.measure()
+        self.camera.next_us += self.camera.period_us()
+
+    def _step_plant(self, t_us):
+        duty = self.duty()
+        while self.now_us < t_us:
+            dt = min(STEP_US, t_us - self.now_us)
+            self.plant.step(duty, dt * 1e-6)
+            self.now_us += dt
+
+    def i2c_time(self, nbytes):
+        """!
+        Let the time pass which an I2C transfer would take, counting 9 clocks a byte.
+        @param nbytes: number of bytes sent or received, including addresses
+        """
+        self.advance(nbytes * 9 * 1000000 // self.i2c_freq)
+
+    def pin_changed(self, name, value):
+        self.pin_log.append((self.now_us, name, value, self.plant.turret))
+
+    def pwm_changed(self, name, pulse_us):
+        self.pwm_log.append((self.now_us, name, pulse_us, self.plant.turret))
+
+
+## The one simulated world used by all the stand-in modules
+world = World()
@@ -0,0 +1,93 @@
+"""!
+@file snapshot.py
+    This file contains class Snapshot, which takes the encoder's readings once per
+    scheduler tick and gives the same values to everything in the task which uses them
+    during that tick, so the control law, the log, the printout and the settling test
+    all agree on where the motor is.
+
+@author Brendan Stratford
+@author Johnathan Waldmire
+@author Jonathan Romeo
+@date   10/18/2026
+"""
+
+import pyb
+
+
+class Snapshot:
+    """!
+    A copy of the panning encoder's state, taken by take() once at the start of each
+    scheduler tick. It has the same read(), at_rest() and still_us() methods as the
+    Encoder, so it can be handed to anything which expects one; they all return what the
+    encoder said when the snapshot was taken, and read() has no side effects.
+
+    When the encoder is read in a timer interrupt, take() copies its state with
+    interrupts off, so the position, speed and time all come from the same reading. The
+    snapshot's fields are small integers held on the object, so taking one allocates
+    nothing.
+
+    Every read() after the first in a tick would have been another encoder reading
+    before; these are counted in @c saved.
+    """
+
+    def __init__(self, enc):
+        """!
+        @param enc: the Encoder to take readings from
+        """
+        self.enc = enc
+        ## Encoder position [encoder counts]
+        self.position = enc.position
+        ## Smoothed speed [encoder counts/s]
+        self.velocity = 0
+        ## Time of the encoder reading, from utime.ticks_us()
+        self.time = enc.time
+        self._still = 0
+        self._used = False
+        ## Number of snapshots taken
+        self.taken = 0
+        ## Number of encoder readings saved by giving out the snapshot instead
+        self.saved = 0
+
+    def take(self, read=False):
+        """!
+        Take a new snapshot, at the start of a scheduler tick.
+        @param read: True to read the encoder first; leave False when the control loop
+               has just read it, or reads it in a timer interrupt
+        """
+        enc = self.enc
+        state = pyb.disable_irq()
+        if read:
+            enc.read()
+        self.position = enc.position
+        self.velocity = enc.velocity
+        self.time = enc.time
+        self._still = enc.still_us()
+        pyb.enable_irq(state)
+        self._used = False
+        self.taken += 1
+
+    def read(self):
+        """!
+        @return the encoder position in the snapshot [encoder counts]
+        """
+        if self._used:
+            self.saved += 1
+        else:
+            self._used = True
+        return self.position
+
+    def still_us(self):
+        """!
+        @return how long the count had stood still when the snapshot was taken [us]
+        """
+        return self._still
+
+    def at_rest(self, speed=50, hold_ms=20):
+        """!
+        Check whether the motor had stopped when the snapshot was taken, as
+        Encoder.at_rest() does.
+        @param speed: the fastest the smoothed speed may be [encoder counts/s]
+        @param hold_ms: how long the count must have stood still [ms]
+        @return True if the motor was at rest
+        """
+        return -speed <= self.velocity <= speed and self._still >= hold_ms * 1000
@@ -1,36 +1,13 @@
+import pyb
 import utime
+import servo_driver
 
 pinC7 = pyb.Pin(pyb.Pin.board.PC7, pyb.Pin.OUT_PP)
-pinC7.value(0)
-utime.sleep_ms(20)
-
-pinC7.value(1)
-utime.sleep_us(2000)
-pinC7.value(0)
-utime.sleep_ms(18)
-
-utime.sleep_ms(300)
-
-pinC7.value(1)
-pinC7.value(0)
-
-pinC7.value(1)
-utime.sleep_us(500)
-pinC7.value(0)
-utime.sleep_ms(19)
-
-utime.sleep_ms(100)
-
-pinC7.value(1)
-pinC7.value(0)
-
-
-
-
-
-
-
-
-
-
-    
+timmy_s = pyb.Timer(8, freq=50)
+ch_s = timmy_s.channel(2, pyb.Timer.PWM, pin=pinC7)
+servo = servo_driver.ServoDriver(pinC7, timmy_s, ch_s)
+
+# Pull the trigger in, then release it and stop the servo
+servo.fire()
+while servo.update():
+    utime.sleep_ms(10)
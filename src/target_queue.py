@@ -0,0 +1,153 @@
+"""!
+@file target_queue.py
+    This file contains class TargetQueue, which carries the targets found by the camera task
+    to the motor task, and class Target, which holds one of them. Each record has the
+    target's column, the camera's confidence in it, the ID of the frame it was found in,
+    the time the frame came in and the panning encoder's position at that time, so the
+    motor task can tell new targets from old ones, throw away any which are too old, and
+    aim from where the turret was when the picture was taken rather than where it is now.
+
+@author Brendan Stratford
+@author Johnathan Waldmire
+@author Jonathan Romeo
+@date   10/18/2026
+"""
+
+from array import array
+import utime
+
+
+class Target:
+    """!
+    One target taken from a TargetQueue. A task makes one Target and has the queue fill it
+    in each time, so getting a target allocates nothing.
+    """
+
+    def __init__(self):
+        ## Column at which the target was seen [hundredths of a column]
+        self.col = 0
+        ## The camera's confidence in the target [%]
+        self.confidence = 0
+        ## ID of the frame the target was found in
+        self.frame_id = 0
+        ## When the frame came in, from utime.ticks_ms()
+        self.time = 0
+        ## Panning encoder position when the frame came in [encoder counts]
+        self.pos = 0
+
+    def age_ms(self):
+        """!
+        @return how long ago the frame came in [ms]
+        """
+        return utime.ticks_diff(utime.ticks_ms(), self.time)
+
+
+class TargetQueue:
+    """!
+    A first in, first out queue of target records, kept in arrays allocated when the queue
+    is made. The camera mustn't be held up by a motor task which has fallen behind, so
+    when the queue is full a new record overwrites the oldest one, which is counted in
+    @c overwritten. The queue counts the records put in it in @c version, so a
+    task_wait.WaitTask can wait for the next one.
+    """
+
+    def __init__(self, size=4, name=None):
+        """!
+        @param size: the most records the queue holds
+        @param name: a name for the queue, used when it's printed
+        """
+        self.name = name
+        self.size = size
+        self._col = array('h', [0] * size)
+        self._confidence = array('h', [0] * size)
+        self._frame_id = array('L', [0] * size)
+        self._time = array('l', [0] * size)
+        self._pos = array('l', [0] * size)
+        self._next = 0
+        self._count = 0
+        ## Number of records put in the queue
+        self.version = 0
+        ## Number of records overwritten before they were taken
+        self.overwritten = 0
+        ## Number of records thrown away for being too old
+        self.stale = 0
+
+    def put(self, col, confidence, frame_id, time, pos):
+        """!
+        Add a target to the queue.
+        @param col: column at which the target was seen [hundredths of a column]
+        @param confidence: the camera's confidence in the target [%]
+        @param frame_id: ID of the frame the target was found in
+        @param time: when the frame came in, from utime.ticks_ms()
+        @param pos: panning encoder position when the frame came in [encoder counts]
+        """
+        idx = self._next
+        self._col[idx] = col
+        self._confidence[idx] = confidence
+        self._frame_id[idx] = frame_id
+        self._time[idx] = time
+        self._pos[idx] = pos
+        idx += 1
+        self._next = 0 if idx == self.size else idx
+        if self._count < self.size:
+            self._count += 1
+        else:
+            self.overwritten += 1
+        self.version += 1
+
+    def any(self):
+        """!
+        @return True if there are any records in the queue
+        """
+        return self._count > 0
+
+    def num_in(self):
+        """!
+        @return the number of records in the queue
+        """
+        return self._count
+
+    def clear(self):
+        """!
+        Throw away all the records in the queue.
+        """
+        self._count = 0
+
+    def get(self, target):
+        """!
+        Take the oldest record from the queue.
+        @param target: the Target to fill in
+        @return True if there was a record, or False if the queue was empty
+        """
+        if not self._count:
+            return False
+        idx = self._next - self._count
+        if idx < 0:
+            idx += self.size
+        target.col = self._col[idx]
+        target.confidence = self._confidence[idx]
+        target.frame_id = self._frame_id[idx]
+        target.time = self._time[idx]
+        target.pos = self._pos[idx]
+        self._count -= 1
+        return True
+
+    def get_latest(self, target, max_age_ms=None):
+        """!
+        Take the newest record from the queue, throwing away any older ones, since only
+        the newest matters when aiming.
+        @param target: the Target to fill in
+        @param max_age_ms: the oldest a record may be [ms], or None to take any
+        @return True if there was a record new enough; if not, the queue is left empty
+        """
+        found = False
+        while self.get(target):
+            found = True
+        if found and max_age_ms is not None and target.age_ms() > max_age_ms:
+            self.stale += 1
+            return False
+        return found
+
+    def __repr__(self):
+        return (f"TargetQueue {self.name}: {self._count}/{self.size} records, "
+                f"{self.version} put, {self.overwritten} overwritten, {self.stale} stale")
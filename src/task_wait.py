@@ -0,0 +1,134 @@
+"""!
+@file task_wait.py
+    This file contains class WaitTask, a cotask Task which can wait for a deadline or for
+    new data in a target_queue.TargetQueue without being run at all until then.
+
+    Rather than counting task runs until enough time has passed, a task asks to sleep and
+    then yields, and the scheduler passes over it until it's woken:
+    @code
+    task2.sleep_ms(500)          # run again in half a second
+    yield 2
+    task2.wait_for(targets, seen)    # run again once targets.version != seen
+    yield 2
+    @endcode
+    A deadline wakes the task on the first scheduler pass after it, however long the
+    task's period is. cotask doesn't need to be changed.
+
+@author Brendan Stratford
+@author Johnathan Waldmire
+@author Jonathan Romeo
+@date   10/18/2026
+"""
+
+import utime
+import cotask
+
+
+class WaitTask(cotask.Task):
+    """!
+    A Task which can be put to sleep until a time, until a TargetQueue is written, or
+    until another task resumes it. While asleep, ready() says the task isn't ready and
+    lets its periods go by, so the task isn't run and doesn't pile up late runs; once
+    woken, it runs straight away and its periods start again from then.
+    """
+
+    def __init__(self, run_fun, name="NoName", priority=0, period=None, profile=False,
+                 trace=False, shares=()):
+        super().__init__(run_fun, name, priority, period, profile, trace, shares)
+        self._waiting = False
+        self._until = None
+        self._share = None
+        self._seen = 0
+        ## Number of times the task has been woken from a wait
+        self.wakes = 0
+
+    def sleep_until(self, ticks):
+        """!
+        Don't run the task again until a time.
+        @param ticks: when to wake, in utime.ticks_ms() counts
+        """
+        self._until = ticks
+        self._share = None
+        self._waiting = True
+
+    def sleep_ms(self, ms):
+        """!
+        Don't run the task again until some time has passed.
+        @param ms: how long to sleep [ms]
+        """
+        self.sleep_until(utime.ticks_add(utime.ticks_ms(), ms))
+
+    def wait_for(self, share, seen, timeout_ms=None):
+        """!
+        Don't run the task again until a share has been written.
+        @param share: the target_queue.TargetQueue, or anything else which counts its
+               updates in @c version, to watch
+        @param seen: the share's version when the task last looked at it; the task wakes
+               as soon as the version is different, even if that's already so
+        @param timeout_ms: wake anyway after this long [ms], or None to wait for ever
+        """
+        self._until = (None if timeout_ms is None
+                       else utime.ticks_add(utime.ticks_ms(), timeout_ms))
+        self._share = share
+        self._seen = seen
+        self._waiting = True
+
+    def suspend(self):
+        """!
+        Don't run the task again until resume() is called.
+        """
+        self._until = None
+        self._share = None
+        self._waiting = True
+
+    def resume(self):
+        """!
+        Wake the task, whatever it's waiting for.
+        """
+        self._until = utime.ticks_ms()
+
+    @property
+    def waiting(self):
+        """!
+        True while the task is asleep.
+        """
+        return self._waiting
+
+    def _woken(self):
+        if self._share is not None and self._share.version != self._seen:
+            return True
+        return self._until is not None and utime.ticks_diff(utime.ticks_ms(), self._until) >= 0
+
+    def ready(self):
+        """!
+        @return True if the task should run now: it has just been woken, or it isn't
+                asleep and is ready as far as cotask.Task is concerned
+        """
+        if not self._waiting:
+            return super().ready()
+        if not self._woken():
+            if self.period is not None:
+                # Let the periods go by, so a long sleep isn't followed by catch-up runs
+                late = utime.ticks_diff(utime.ticks_us(), self._next_run)
+                if late >= 0:
+                    self._next_run = utime.ticks_add(self._next_run,
+                                                     (late // self.period + 1) * self.period)
+            return False
+        self._waiting = False
+        self._share = None
+        self.wakes += 1
+        if self.period is not None:
+            self._next_run = utime.ticks_add(utime.ticks_us(), self.period)
+        self.go_flag = True
+        return True
+
+    def due_in(self):
+        """!
+        Used by the simulation's scheduler to skip ahead while no task is ready.
+        @return microseconds until the task might next run, or None if that isn't known
+        """
+        if not self._waiting:
+            return super().due_in()
+        if self._until is None:
+            return None
+        return max(0, utime.ticks_diff(self._until, utime.ticks_ms()) * 1000)
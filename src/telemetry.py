@@ -0,0 +1,260 @@
+"""!
+@file telemetry.py
+    This file contains class Telemetry, which sends what the turret's tasks are doing to a
+    PC as fixed-size binary records, and functions which decode those records on the PC.
+
+    Printing text over the USB serial port from inside the control loop takes long enough
+    to change the timing being watched. Instead, each record is packed into a preallocated
+    ring buffer, which takes a few tens of microseconds, and a low priority task drains the
+    buffer to a serial port in bulk writes when nothing else needs to run. main.py sends
+    them on a UART of their own, so that text printed to the REPL, such as the report
+    after the shot, never lands in the middle of the binary stream.
+
+    Every record is 24 bytes, all little-endian: a sync byte (0xA5), the kind of record,
+    the task number, the task's state, the time from utime.ticks_us() (unsigned 32 bit,
+    though on the board it wraps at 2**30), the panning encoder position, the setpoint
+    (both signed 32 bit), the duty cycle (signed 16 bit), the controller's integral sum
+    (signed 32 bit), a sequence number which counts records modulo 256, so dropped
+    records show up as gaps, and an end byte (0x96). Neither marker byte is ASCII, so
+    should text get into the stream between records anyway, it's skipped when decoding.
+    The kinds of record, and what they carry in the position, setpoint, duty cycle and
+    integral fields where that differs, are:
+    - SAMPLE: one run of the motor task
+    - DONE: a move has settled
+    - SP: a new setpoint from the camera; the duty cycle field holds the target's age [ms]
+      and the integral field its frame ID
+    - FREEZE: the camera task has a frame to process
+    - VAL: the camera found the target; the setpoint field holds its column [hundredths of
+      a column], the duty cycle field the confidence [%] and the integral field the frame ID
+    - FIRE: the trigger is pulled
+
+    On the PC, capture the UART through a USB serial adapter to a file and decode it to
+    CSV, or load it into NumPy:
+    @code
+    stty -F /dev/ttyUSB0 921600 raw
+    cat /dev/ttyUSB0 > run.bin                   # while the turret runs
+    python telemetry.py run.bin > run.csv
+    python telemetry.py run.bin --npz run.npz
+    @endcode
+
+@author Brendan Stratford
+@author Johnathan Waldmire
+@author Jonathan Romeo
+@date   10/18/2026
+"""
+
+import struct
+
+# Off the board, where the records are decoded, there's no utime, and only the
+# decoding functions are used
+try:
+    import utime
+except ImportError:
+    utime = None
+
+## Layout of a record: sync, kind, task, state, time, position, setpoint, duty cycle,
+#  integral sum, sequence number, end
+RECORD = '<BBBBIllhlBB'
+## Size of a record [bytes]
+RECORD_SIZE = struct.calcsize(RECORD)
+## First byte of every record
+SYNC = 0xA5
+## Last byte of every record
+END = 0x96
+
+## One run of the motor task
+SAMPLE = 0
+## A move has settled
+DONE = 1
+## A new setpoint from the camera
+SP = 2
+## The camera task has a frame to process
+FREEZE = 3
+## The camera found the target
+VAL = 4
+## The trigger is pulled
+FIRE = 5
+
+## Names of the kinds of record, in order
+KINDS = ('SAMPLE', 'DONE', 'SP', 'FREEZE', 'VAL', 'FIRE')
+## Names of the fields of a decoded record, in order
+FIELDS = ('kind', 'task', 'state', 'time', 'pos', 'setpoint', 'pwm', 'esum', 'seq')
+
+
+class Telemetry:
+    """!
+    A ring buffer of telemetry records, allocated when it's made. record() packs a record
+    into the next free slot; if the buffer is full the record is thrown away and counted
+    in @c dropped, so a slow serial port never holds up the task making records. drain()
+    writes out everything waiting in at most two writes, one for each side of the ring's
+    wrap-around point.
+    """
+
+    def __init__(self, capacity=128, stream=None):
+        """!
+        @param capacity: the most records the buffer holds
+        @param stream: where drain() writes, such as an open file or a @c pyb.UART;
+               None for the USB serial port, @c pyb.USB_VCP(), which is shared with
+               anything printed
+        """
+        if stream is None:
+            import pyb
+            stream = pyb.USB_VCP()
+        self.stream = stream
+        self._size = capacity * RECORD_SIZE
+        self._buf = bytearray(self._size)
+        self._view = memoryview(self._buf)
+        self._head = 0       # byte offset at which the next record goes
+        self._tail = 0       # byte offset of the first byte not yet written out
+        self._used = 0       # bytes waiting to be written out
+        self._seq = 0
+        ## Number of records made
+        self.records = 0
+        ## Number of records thrown away because the buffer was full
+        self.dropped = 0
+        ## Number of bytes written out
+        self.sent = 0
+
+    def record(self, kind, task, state, pos=0, setpoint=0, pwm=0, esum=0):
+        """!
+        Add a record to the buffer, time-stamped now.
+        @param kind: the kind of record, such as SAMPLE or FIRE
+        @param task: the number of the task making the record
+        @param state: the state the task is in
+        @param pos: the panning encoder position [encoder counts]
+        @param setpoint: the setpoint [encoder counts]
+        @param pwm: the duty cycle [%]
+        @param esum: the controller's integral sum
+        @return True if the record was added, False if the buffer was full
+        """
+        seq = self._seq
+        self._seq = (seq + 1) & 0xFF
+        self.records += 1
+        if self._used + RECORD_SIZE > self._size:
+            self.dropped += 1
+            return False
+        pwm = int(pwm)
+        if pwm > 32767:
+            pwm = 32767
+        elif pwm < -32768:
+            pwm = -32768
+        struct.pack_into(RECORD, self._buf, self._head, SYNC, kind, task, state,
+                         utime.ticks_us(), int(pos), int(setpoint), pwm,
+                         int(esum), seq, END)
+        head = self._head + RECORD_SIZE
+        self._head = 0 if head == self._size else head
+        self._used += RECORD_SIZE
+        return True
+
+    def waiting(self):
+        """!
+        @return the number of bytes waiting to be written out
+        """
+        return self._used
+
+    def drain(self):
+        """!
+        Write out the records waiting in the buffer. A stream which takes only part of a
+        write, as a USB serial port with no PC reading it may, is given the rest next time.
+        @return the number of bytes written
+        """
+        total = 0
+        while self._used:
+            tail = self._tail
+            end = tail + self._used
+            if end > self._size:
+                end = self._size
+            count = self.stream.write(self._view[tail:end])
+            if count is None:        # a stream which doesn't say takes everything
+                count = end - tail
+            if not count:
+                break
+            tail += count
+            self._tail = 0 if tail == self._size else tail
+            self._used -= count
+            total += count
+        self.sent += total
+        return total
+
+    def __repr__(self):
+        return (f"Telemetry: {self.records} records, {self.dropped} dropped, "
+                f"{self.sent} bytes sent, {self._used} bytes waiting")
+
+
+def decode(data):
+    """!
+    Find the records in a captured byte stream, skipping anything else, such as text
+    printed between them.
+    @param data: bytes captured from the serial port
+    @return a list of tuples, one per record, holding the fields named in FIELDS
+    """
+    records = []
+    last = len(data) - RECORD_SIZE
+    pos = data.find(SYNC)
+    while 0 <= pos <= last:
+        if data[pos + RECORD_SIZE - 1] == END and data[pos + 1] < len(KINDS):
+            records.append(struct.unpack_from(RECORD, data, pos)[1:-1])
+            pos += RECORD_SIZE
+            if pos <= last and data[pos] == SYNC:
+                continue
+        else:
+            pos += 1
+        pos = data.find(SYNC, pos)
+    return records
+
+
+def gaps(records):
+    """!
+    @param records: records from decode()
+    @return the number of records missing, found from gaps in the sequence numbers
+    """
+    missing = 0
+    for prev, rec in zip(records, records[1:]):
+        missing += (rec[-1] - prev[-1] - 1) & 0xFF
+    return missing
+
+
+def write_csv(records, stream):
+    """!
+    Write records as CSV, with a header line and the kinds of record by name.
+    @param records: records from decode()
+    @param stream: text stream to write to
+    """
+    stream.write(','.join(FIELDS) + '\n')
+    for rec in records:
+        stream.write(KINDS[rec[0]] + ',' + ','.join(str(val) for val in rec[1:]) + '\n')
+
+
+def to_numpy(records):
+    """!
+    Put records into a NumPy structured array, with one field for each name in FIELDS.
+    This needs NumPy, so it's only for the PC.
+    @param records: records from decode()
+    @return the array
+    """
+    import numpy as np
+    dtype = np.dtype([('kind', 'u1'), ('task', 'u1'), ('state', 'u1'), ('time', '<u4'),
+                      ('pos', '<i4'), ('setpoint', '<i4'), ('pwm', '<i2'), ('esum', '<i4'),
+                      ('seq', 'u1')])
+    return np.array(records, dtype=dtype)
+
+
+if __name__ == "__main__":
+    # Decode a captured telemetry stream on a PC, e.g.
+    #     python telemetry.py run.bin > run.csv
+    import sys
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Decode turret telemetry")
+    parser.add_argument('capture', help="file of bytes captured from the serial port")
+    parser.add_argument('--npz', help="save a NumPy .npz file instead of writing CSV")
+    args = parser.parse_args()
+
+    with open(args.capture, 'rb') as file:
+        recs = decode(file.read())
+    if args.npz:
+        import numpy as np
+        np.savez(args.npz, telemetry=to_numpy(recs))
+    else:
+        write_csv(recs, sys.stdout)
+    print(f'{len(recs)} records, {gaps(recs)} missing', file=sys.stderr)
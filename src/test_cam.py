@@ -50,8 +50,8 @@ if __name__ == "__main__":
         # could also be written to a file. Spreadsheets, Matlab(tm), or
         # CPython can read CSV and make a decent false-color heat plot.
         
-        val = camera.get_csv(image, limits=(0, 99))
-        print(val)
+        val = camera.locate_target(image, limits=(0, 99))
+        print(val, camera.hot_rows, camera.confidence)
         gc.collect()
         #print(f"Memory: {gc.mem_free()} B free")
         time.sleep_ms(100)